@@ -0,0 +1,38 @@
+"""Stream a JSONL or CSV job feed into the jobs collection.
+
+Usage: python ingest_jobs.py path/to/feed.jsonl [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from server import JOB_FEED_BATCH_SIZE, client, ensure_indexes, ingest_job_feed
+
+
+def print_progress(stats):
+    print(f"\r{stats['rows_read']} rows read, {stats['rows_invalid']} invalid", end="", flush=True)
+
+
+async def main(feed_path: Path, batch_size: int) -> int:
+    await ensure_indexes()
+    try:
+        stats = await ingest_job_feed(feed_path, batch_size, progress=print_progress)
+    finally:
+        client.close()
+    print()
+    print(f"Ingested {stats['rows_valid']} jobs ({stats['upserted']} new, {stats['modified']} updated) "
+          f"in {stats['elapsed_seconds']}s - {stats['rows_per_second']} rows/sec")
+    for error in stats["errors"]:
+        print(f"  line {error['line']}: {error['error']}")
+    return 0 if not stats["rows_invalid"] else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a job listings feed into MongoDB")
+    parser.add_argument("feed", type=Path, help="JSONL or CSV feed file")
+    parser.add_argument("--batch-size", type=int, default=JOB_FEED_BATCH_SIZE)
+    args = parser.parse_args()
+    if not args.feed.is_file():
+        parser.error(f"feed not found: {args.feed}")
+    sys.exit(asyncio.run(main(args.feed, args.batch_size)))
@@ -1,21 +1,39 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Dict, Any
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 import jwt
 import hashlib
+import gzip
 import requests
 import asyncio
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 import json
+import csv
+import itertools
+import base64
+import bisect
+import heapq
+import math
+import re
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import numpy as np
 
 
 ROOT_DIR = Path(__file__).parent
@@ -26,6 +44,10 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+def stable_id(*parts: str) -> str:
+    """Deterministic id for seeded records, identical across workers and restarts"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, "|".join(parts)))
+
 # Security
 SECRET_KEY = "relocate-me-secret-key-2025"
 ALGORITHM = "HS256"
@@ -49,12 +71,18 @@ class User(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     current_step: int = 1
     completed_steps: List[int] = Field(default_factory=list)
+    completed_mask: int = 0  # bit n set when timeline step n is completed
+    progress_seeded: bool = False  # sample progress items have been created
+    skills: List[str] = Field(default_factory=list)
 
 class UserCreate(BaseModel):
     username: str
     password: str
     email: Optional[str] = None
 
+class SkillsUpdate(BaseModel):
+    skills: List[str]
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -63,11 +91,14 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
-class ProgressUpdate(BaseModel):
+class StepProgressUpdate(BaseModel):
     step_id: int
     completed: bool
     notes: Optional[str] = None
 
+class StepProgressBatch(BaseModel):
+    updates: List[StepProgressUpdate]
+
 class TimelineStep(BaseModel):
     id: int
     title: str
@@ -773,6 +804,180 @@ RELOCATION_TIMELINE = [
     {"id": 34, "title": "Long-term Setup", "description": "Establish routines, friendships, local connections", "category": "Settlement", "estimated_days": 60, "dependencies": [33], "resources": ["Social Groups", "Hobby Clubs", "Professional Networks"]}
 ]
 
+# Timeline scheduling. The step graph is compiled once; each user's schedule
+# keeps its forward (earliest start/finish) and backward (longest remaining
+# path) passes so toggling a step only revisits its descendants/ancestors.
+class TimelineGraph:
+    def __init__(self, steps):
+        self.steps = {step["id"]: step for step in steps}
+        self.duration = {step_id: step["estimated_days"] for step_id, step in self.steps.items()}
+        self.dependencies = {step_id: tuple(step["dependencies"]) for step_id, step in self.steps.items()}
+        self.dependents = {step_id: [] for step_id in self.steps}
+        for step_id, dependencies in self.dependencies.items():
+            for dependency in dependencies:
+                if dependency not in self.steps:
+                    raise ValueError(f"Timeline step {step_id} depends on unknown step {dependency}")
+                self.dependents[dependency].append(step_id)
+        
+        # Kahn's algorithm, lowest id first so the order is stable
+        indegree = {step_id: len(dependencies) for step_id, dependencies in self.dependencies.items()}
+        ready = [step_id for step_id, count in indegree.items() if count == 0]
+        heapq.heapify(ready)
+        self.order = []
+        while ready:
+            step_id = heapq.heappop(ready)
+            self.order.append(step_id)
+            for dependent in self.dependents[step_id]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+        if len(self.order) != len(self.steps):
+            raise ValueError("Timeline dependencies contain a cycle")
+        self.rank = {step_id: rank for rank, step_id in enumerate(self.order)}
+        
+        descendants = {}
+        for step_id in reversed(self.order):
+            reachable = set(self.dependents[step_id])
+            for dependent in self.dependents[step_id]:
+                reachable.update(descendants[dependent])
+            descendants[step_id] = reachable
+        ancestors = {}
+        for step_id in self.order:
+            reachable = set(self.dependencies[step_id])
+            for dependency in self.dependencies[step_id]:
+                reachable.update(ancestors[dependency])
+            ancestors[step_id] = reachable
+        # Affected subgraphs in the order each pass has to visit them
+        self.downstream = {step_id: tuple(sorted(nodes, key=self.rank.get)) for step_id, nodes in descendants.items()}
+        self.upstream = {step_id: tuple(sorted(nodes, key=self.rank.get, reverse=True)) for step_id, nodes in ancestors.items()}
+
+class TimelineSchedule:
+    def __init__(self, graph: TimelineGraph, completed):
+        self.graph = graph
+        self.completed = {step_id for step_id in completed if step_id in graph.steps}
+        self.earliest_start = {}
+        self.earliest_finish = {}
+        self.tail = {}  # longest path from the start of a step to the end of the project
+        for step_id in graph.order:
+            self._forward(step_id)
+        for step_id in reversed(graph.order):
+            self._backward(step_id)
+    
+    def _duration(self, step_id):
+        return 0 if step_id in self.completed else self.graph.duration[step_id]
+    
+    def _forward(self, step_id) -> bool:
+        start = max((self.earliest_finish[dependency] for dependency in self.graph.dependencies[step_id]), default=0)
+        finish = start + self._duration(step_id)
+        changed = self.earliest_start.get(step_id) != start or self.earliest_finish.get(step_id) != finish
+        self.earliest_start[step_id] = start
+        self.earliest_finish[step_id] = finish
+        return changed
+    
+    def _backward(self, step_id) -> bool:
+        tail = self._duration(step_id) + max((self.tail[dependent] for dependent in self.graph.dependents[step_id]), default=0)
+        changed = self.tail.get(step_id) != tail
+        self.tail[step_id] = tail
+        return changed
+    
+    def toggle(self, step_id: int, completed: bool) -> int:
+        """Mark one step (in)complete and recompute only the affected subgraph"""
+        if step_id not in self.graph.steps or (step_id in self.completed) == completed:
+            return 0
+        if completed:
+            self.completed.add(step_id)
+        else:
+            self.completed.discard(step_id)
+        
+        recomputed = 0
+        dirty = {step_id}
+        for node in (step_id,) + self.graph.downstream[step_id]:
+            if node in dirty:
+                recomputed += 1
+                if self._forward(node):
+                    dirty.update(self.graph.dependents[node])
+        dirty = {step_id}
+        for node in (step_id,) + self.graph.upstream[step_id]:
+            if node in dirty:
+                recomputed += 1
+                if self._backward(node):
+                    dirty.update(self.graph.dependencies[node])
+        return recomputed
+    
+    def sync(self, completed) -> int:
+        completed = {step_id for step_id in completed if step_id in self.graph.steps}
+        recomputed = 0
+        for step_id in completed - self.completed:
+            recomputed += self.toggle(step_id, True)
+        for step_id in self.completed - completed:
+            recomputed += self.toggle(step_id, False)
+        return recomputed
+    
+    @property
+    def duration(self) -> int:
+        return max(self.earliest_finish.values(), default=0)
+    
+    def slack(self, step_id) -> int:
+        return self.duration - self.tail[step_id] - self.earliest_start[step_id]
+    
+    def critical_path(self) -> List[int]:
+        # Completed steps take zero days and are walked through like any other
+        # step, so the path continues past them; they are only left out of the result
+        path = []
+        current = next((step_id for step_id in self.graph.order
+                        if self.earliest_start[step_id] == 0 and self.slack(step_id) == 0), None)
+        while current is not None:
+            if current not in self.completed:
+                path.append(current)
+            finish = self.earliest_finish[current]
+            current = next((dependent for dependent in sorted(self.graph.dependents[current], key=self.graph.rank.get)
+                            if self.earliest_start[dependent] == finish and self.slack(dependent) == 0), None)
+        return path
+
+TIMELINE_GRAPH = TimelineGraph(RELOCATION_TIMELINE)
+
+# Completed steps are handled as a bitmask (bit n = step n). Each step is
+# rendered once in both states and responses reuse those dicts, so building a
+# timeline is a list of lookups and category totals are popcounts.
+def steps_to_mask(step_ids) -> int:
+    mask = 0
+    for step_id in step_ids:
+        if step_id in TIMELINE_GRAPH.steps:
+            mask |= 1 << step_id
+    return mask
+
+def mask_to_steps(mask: int) -> List[int]:
+    return [step["id"] for step in RELOCATION_TIMELINE if mask >> step["id"] & 1]
+
+TIMELINE_STEP_STATES = [
+    (1 << step["id"], ({**step, "is_completed": False}, {**step, "is_completed": True}))
+    for step in RELOCATION_TIMELINE
+]
+TIMELINE_CATEGORIES = {}
+for bit, states in TIMELINE_STEP_STATES:
+    category = TIMELINE_CATEGORIES.setdefault(states[0]["category"], {"mask": 0, "steps": []})
+    category["mask"] |= bit
+    category["steps"].append((bit, states))
+TIMELINE_SCHEDULE_CACHE_SIZE = int(os.environ.get("TIMELINE_SCHEDULE_CACHE_SIZE", "1024"))
+timeline_schedules = OrderedDict()
+timeline_schedule_stats = {"full_builds": 0, "incremental_updates": 0, "steps_recomputed": 0}
+
+def get_timeline_schedule(user) -> TimelineSchedule:
+    schedule = timeline_schedules.get(user.id)
+    if schedule is None:
+        schedule = TimelineSchedule(TIMELINE_GRAPH, user.completed_steps)
+        timeline_schedule_stats["full_builds"] += 1
+        timeline_schedules[user.id] = schedule
+        if len(timeline_schedules) > TIMELINE_SCHEDULE_CACHE_SIZE:
+            timeline_schedules.popitem(last=False)
+    else:
+        timeline_schedules.move_to_end(user.id)
+        recomputed = schedule.sync(user.completed_steps)
+        if recomputed:
+            timeline_schedule_stats["incremental_updates"] += 1
+            timeline_schedule_stats["steps_recomputed"] += recomputed
+    return schedule
+
 # Authentication functions
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -780,6 +985,80 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# bcrypt is deliberately slow, so hashing runs on a small dedicated thread pool
+# instead of the event loop. Requests beyond the queue limit are rejected with
+# 503 rather than piling up behind a login burst.
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+
+class PasswordHasher:
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+
+    def _timed(self, enqueued_at: float, func, *args):
+        started_at = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished_at = time.perf_counter()
+            wait = started_at - enqueued_at
+            elapsed = finished_at - started_at
+            self.queue_wait_total += wait
+            self.queue_wait_max = max(self.queue_wait_max, wait)
+            self.hash_time_total += elapsed
+            self.hash_time_max = max(self.hash_time_max, elapsed)
+            self.completed += 1
+
+    async def _submit(self, func, *args):
+        # Everything beyond the running workers is waiting in the executor queue
+        if self._pending >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, time.perf_counter(), func, *args)
+        finally:
+            self._pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(get_password_hash, password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": min(self._pending, self.workers),
+            "queued": max(0, self._pending - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": (self.queue_wait_total / self.completed * 1000) if self.completed else 0,
+            "max_queue_wait_ms": self.queue_wait_max * 1000,
+            "avg_hash_time_ms": (self.hash_time_total / self.completed * 1000) if self.completed else 0,
+            "max_hash_time_ms": self.hash_time_max * 1000
+        }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -790,6 +1069,67 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Per-worker cache of validated users, keyed by the JWT subject (username).
+# Writes to a user document must call user_cache.invalidate(username); other
+# workers only see the change once their entry expires, so keep the TTL short.
+USER_CACHE_TTL_SECONDS = float(os.environ.get("USER_CACHE_TTL_SECONDS", "15"))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get("USER_CACHE_MAX_ENTRIES", "1024"))
+
+class UserCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, username: str) -> Optional["User"]:
+        entry = self._entries.get(username)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._entries[username]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(username)
+        self.hits += 1
+        return user
+
+    def put(self, username: str, user: "User"):
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        self._entries[username] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, username: str):
+        if self._entries.pop(username, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+user_cache = UserCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -804,26 +1144,120 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.PyJWTError:
         raise credentials_exception
     
+    cached_user = user_cache.get(username)
+    if cached_user is not None:
+        return cached_user
+    
     user = await db.users.find_one({"username": username})
     if user is None:
         raise credentials_exception
-    return User(**user)
+    if "completed_mask" not in user:
+        user["completed_mask"] = steps_to_mask(user.get("completed_steps", []))
+    current_user = User(**user)
+    user_cache.put(username, current_user)
+    return current_user
 
 # Initialize default user on startup
 async def create_default_user():
     existing_user = await db.users.find_one({"username": "relocate_user"})
     if not existing_user:
-        hashed_password = get_password_hash("SecurePass2025!")
+        hashed_password = await password_hasher.hash("SecurePass2025!")
         default_user = User(
             username="relocate_user",
             email="relocate@example.com",
             hashed_password=hashed_password,
             current_step=1,
-            completed_steps=[1, 2, 3, 8, 12]  # Some example completed steps
+            completed_steps=[1, 2, 3, 8, 12],  # Some example completed steps
+            completed_mask=steps_to_mask([1, 2, 3, 8, 12])
         )
         await db.users.insert_one(default_user.dict())
+        user_cache.invalidate(default_user.username)
+        await ensure_progress_seeded(default_user)
         print("Default user created successfully")
 
+# Sample progress items are created once per user. Item ids are derived from
+# the user id, so with the unique (user_id, id) index a repeated insert is a
+# no-op; concurrent requests in one worker share a single seeding task.
+progress_seed_tasks: Dict[str, asyncio.Task] = {}
+
+def build_sample_progress_items(user_id: str) -> List[Dict[str, Any]]:
+    # Dates stay datetimes so they are stored as BSON dates and can be range-queried
+    return [
+        ProgressItem(id=stable_id(user_id, "progress-item", str(index)), user_id=user_id, **item_data).dict()
+        for index, item_data in enumerate(SAMPLE_PROGRESS_ITEMS)
+    ]
+
+async def seed_progress_items(user: User) -> Optional[List[Dict[str, Any]]]:
+    stored = await db.users.find_one({"id": user.id}, {"_id": 0, "progress_seeded": 1})
+    if stored is not None and stored.get("progress_seeded"):
+        return None
+    
+    items = None
+    # Users from before the flag existed may already have items of their own
+    if not await db.progress_items.find_one({"user_id": user.id}, {"_id": 1}):
+        items = build_sample_progress_items(user.id)
+        try:
+            # insert_many adds _id to what it is given; keep the returned items clean
+            await db.progress_items.insert_many([dict(item) for item in items], ordered=False)
+        except BulkWriteError as e:
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+        await rebuild_progress_counters(user.id)
+    await db.users.update_one({"id": user.id}, {"$set": {"progress_seeded": True}})
+    user_cache.invalidate(user.username)
+    return items
+
+async def ensure_progress_seeded(user: User) -> Optional[List[Dict[str, Any]]]:
+    """Seed the user's sample progress items if that hasn't happened yet; returns the new items"""
+    if user.progress_seeded:
+        return None
+    task = progress_seed_tasks.get(user.id)
+    if task is None:
+        task = asyncio.ensure_future(seed_progress_items(user))
+        progress_seed_tasks[user.id] = task
+        task.add_done_callback(lambda _: progress_seed_tasks.pop(user.id, None))
+    return await asyncio.shield(task)
+
+PROGRESS_ITEM_DATE_FIELDS = ("due_date", "completed_date", "created_at", "updated_at")
+
+async def normalize_progress_item_dates(batch_size: int = 1000):
+    """Convert progress item dates that older seeding stored as ISO strings into BSON dates"""
+    query = {"$or": [{field: {"$type": "string"}} for field in PROGRESS_ITEM_DATE_FIELDS]}
+    projection = {field: 1 for field in PROGRESS_ITEM_DATE_FIELDS}
+    updates, converted, unparseable = [], 0, 0
+    async for item in db.progress_items.find(query, projection):
+        fields = {}
+        for field in PROGRESS_ITEM_DATE_FIELDS:
+            value = item.get(field)
+            if isinstance(value, str):
+                try:
+                    fields[field] = datetime.fromisoformat(value)
+                except ValueError:
+                    unparseable += 1
+        if fields:
+            updates.append(UpdateOne({"_id": item["_id"]}, {"$set": fields}))
+        if len(updates) >= batch_size:
+            await db.progress_items.bulk_write(updates, ordered=False)
+            converted += len(updates)
+            updates = []
+    if updates:
+        await db.progress_items.bulk_write(updates, ordered=False)
+        converted += len(updates)
+    if converted or unparseable:
+        logging.getLogger(__name__).info(
+            f"Normalized dates on {converted} progress items ({unparseable} values could not be parsed)"
+        )
+
+async def backfill_completed_masks():
+    """Derive completed_mask for users stored before it existed"""
+    updates = []
+    async for user in db.users.find({"completed_mask": {"$exists": False}}, {"_id": 1, "completed_steps": 1}):
+        mask = steps_to_mask(user.get("completed_steps", []))
+        updates.append(UpdateOne({"_id": user["_id"]}, {"$set": {"completed_mask": mask}}))
+    if updates:
+        await db.users.bulk_write(updates, ordered=False)
+        logging.getLogger(__name__).info("Backfilled completed_mask for %d users", len(updates))
+
 # Password reset endpoints
 @api_router.post("/auth/reset-password")
 async def request_password_reset(reset_request: PasswordReset):
@@ -865,11 +1299,12 @@ async def complete_password_reset(reset_data: PasswordResetComplete):
             detail="Reset code has expired"
         )
     
-    hashed_password = get_password_hash(reset_data.new_password)
+    hashed_password = await password_hasher.hash(reset_data.new_password)
     await db.users.update_one(
         {"username": reset_data.username},
         {"$set": {"hashed_password": hashed_password}}
     )
+    user_cache.invalidate(reset_data.username)
     
     await db.password_resets.delete_one({"_id": reset_record["_id"]})
     return {"message": "Password reset successfully"}
@@ -877,7 +1312,7 @@ async def complete_password_reset(reset_data: PasswordResetComplete):
 @api_router.post("/auth/login", response_model=Token)
 async def login(user_credentials: UserLogin):
     user = await db.users.find_one({"username": user_credentials.username})
-    if not user or not verify_password(user_credentials.password, user["hashed_password"]):
+    if not user or not await password_hasher.verify(user_credentials.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -893,171 +1328,1727 @@ async def login(user_credentials: UserLogin):
 async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
-# Job listings endpoints
-@api_router.get("/jobs/listings")
-async def get_job_listings(category: Optional[str] = None, job_type: Optional[str] = None):
-    jobs = []
-    for job_data in SAMPLE_JOBS:
-        job = JobListing(**job_data)
-        if category and job.category != category:
+@api_router.put("/auth/me/skills")
+async def update_user_skills(skills_update: SkillsUpdate, current_user: User = Depends(get_current_user)):
+    skills = list(dict.fromkeys(skill.strip() for skill in skills_update.skills if skill.strip()))[:100]
+    await db.users.update_one({"username": current_user.username}, {"$set": {"skills": skills}})
+    user_cache.invalidate(current_user.username)
+    return {"message": "Skills updated successfully", "skills": skills}
+
+# Pre-serialized responses for static catalog endpoints. Each payload is
+# JSON-encoded and gzipped once, and carries a strong ETag derived from the
+# encoded bytes, so a changed catalog automatically gets a new validator.
+STATIC_CACHE_CONTROL = f"public, max-age={int(os.environ.get('STATIC_CACHE_MAX_AGE', '300'))}"
+
+class PrecomputedResponse:
+    def __init__(self, data: Any):
+        self.body = json.dumps(
+            jsonable_encoder(data), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        # Strong validators must differ per content-coding
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+    def not_modified(self, request: Request, etag: str) -> bool:
+        """Whether If-None-Match matches etag, the validator of the representation being served"""
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag in ("*", etag):
+                return True
+        return False
+
+    def respond(self, request: Request, cache_control: str = STATIC_CACHE_CONTROL) -> Response:
+        use_gzip = accepts_gzip(request) and len(self.gzip_body) < len(self.body)
+        headers = {
+            "ETag": self.gzip_etag if use_gzip else self.etag,
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding"
+        }
+        if self.not_modified(request, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=self.gzip_body, media_type="application/json", headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+precomputed_responses: Dict[str, PrecomputedResponse] = {}
+
+def precomputed_response(request: Request, key: str, build) -> Response:
+    payload = precomputed_responses.get(key)
+    if payload is None:
+        payload = precomputed_responses[key] = PrecomputedResponse(build())
+    return payload.respond(request)
+
+# Serialized per-user responses that depend only on a small piece of user state
+# (e.g. the completed-step mask) are shared across users in an LRU bounded by
+# the total size of the cached bodies rather than by entry count.
+TIMELINE_RESPONSE_CACHE_BYTES = int(os.environ.get("TIMELINE_RESPONSE_CACHE_BYTES", str(8 * 1024 * 1024)))
+
+class SerializedResponseCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Any, PrecomputedResponse]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncacheable = 0
+
+    @staticmethod
+    def _size(payload: PrecomputedResponse) -> int:
+        return len(payload.body) + len(payload.gzip_body)
+
+    def get(self, key, build) -> PrecomputedResponse:
+        payload = self._entries.get(key)
+        if payload is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+        self.misses += 1
+        payload = PrecomputedResponse(build())
+        size = self._size(payload)
+        if size > self.max_bytes:
+            self.uncacheable += 1
+            return payload
+        self._entries[key] = payload
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= self._size(evicted)
+            self.evictions += 1
+        return payload
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0,
+            "evictions": self.evictions,
+            "uncacheable": self.uncacheable
+        }
+
+timeline_responses = SerializedResponseCache(TIMELINE_RESPONSE_CACHE_BYTES)
+
+# Cursor pagination and sparse fieldsets shared by the list endpoints. Cursors
+# are opaque to clients: url-safe base64 of a small JSON document holding the
+# sort key of the last record on the previous page.
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        position = None
+    if not isinstance(position, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position
+
+def page_size(limit: Optional[int], after: Optional[str]) -> Optional[int]:
+    """Page size for the request, or None to return the full list as before"""
+    if limit is None and after is None:
+        return None
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+def parse_fields(fields: Optional[str], model) -> Optional[List[str]]:
+    """Validate a comma-separated fields= projection; id is always included"""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [field for field in requested if field != "id"]
+
+def project_fields(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+def paginate_positions(positions, records: tuple, position_of: Dict[str, int], limit: Optional[int], after: Optional[str],
+                       ascending: bool = True):
+    """Slice record positions after the cursor; returns (page, next_cursor)
+
+    positions are ascending unless ascending=False, in which case the cursor is
+    located by value instead of by binary search.
+    """
+    if limit is None:
+        return positions, None
+    start = 0
+    if after is not None:
+        last_position = position_of.get(decode_cursor(after).get("id"))
+        if last_position is None:
+            raise HTTPException(status_code=400, detail="Cursor is no longer valid")
+        if ascending:
+            start = bisect.bisect_right(positions, last_position)
+        else:
+            found = np.flatnonzero(np.asarray(positions) == last_position)
+            if not len(found):
+                raise HTTPException(status_code=400, detail="Cursor is no longer valid")
+            start = int(found[0]) + 1
+    page = positions[start:start + limit]
+    next_cursor = None
+    if start + limit < len(positions):
+        next_cursor = encode_cursor({"id": records[page[-1]]["id"]})
+    return page, next_cursor
+
+# Job catalog: listings are validated once into plain dicts, with per-facet
+# posting lists (positions into the jobs tuple) built up front so filtering is
+# a dictionary lookup rather than a scan.
+class JobCatalog:
+    def __init__(self, jobs):
+        self.jobs = tuple(jobs)
+        self.position = {job["id"]: i for i, job in enumerate(self.jobs)}
+        postings: Dict[tuple, List[int]] = {}
+        for i, job in enumerate(self.jobs):
+            category, job_type = job["category"], job["job_type"]
+            for key in ((None, None), (category, None), (None, job_type), (category, job_type)):
+                postings.setdefault(key, []).append(i)
+        self._postings = {key: tuple(positions) for key, positions in postings.items()}
+        self.categories = tuple(sorted({job["category"] for job in self.jobs}))
+        self.job_types = tuple(sorted({job["job_type"] for job in self.jobs}))
+        self.by_category = {
+            category: tuple(self.jobs[i] for i in self._postings[(category, None)])
+            for category in self.categories
+        }
+        self._position_arrays: Dict[tuple, np.ndarray] = {}
+
+    @classmethod
+    def from_records(cls, records):
+        return cls(
+            JobListing(**{"id": stable_id(record["company"], record["title"], record["location"]), **record}).dict()
+            for record in records
+        )
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        position = self.position.get(job_id)
+        return self.jobs[position] if position is not None else None
+
+    def positions(self, category: Optional[str] = None, job_type: Optional[str] = None) -> tuple:
+        return self._postings.get((category or None, job_type or None), ())
+
+    def position_array(self, category: Optional[str] = None, job_type: Optional[str] = None) -> np.ndarray:
+        key = (category or None, job_type or None)
+        array = self._position_arrays.get(key)
+        if array is None:
+            array = self._position_arrays[key] = np.array(self._postings.get(key, ()), dtype=np.int64)
+        return array
+
+    def filter(self, category: Optional[str] = None, job_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        jobs = self.jobs
+        return [jobs[i] for i in self.positions(category, job_type)]
+
+job_catalog = JobCatalog.from_records(SAMPLE_JOBS)
+job_catalog_listeners = []
+
+def prepare_job_catalog(old_catalog: JobCatalog, jobs) -> tuple:
+    """Build a catalog snapshot, its diff against old_catalog and each index's
+    precomputed state. Touches no shared state, so it runs in a worker thread."""
+    new_catalog = JobCatalog(jobs)
+    upserted = [job for job in new_catalog.jobs if old_catalog.get(job["id"]) != job]
+    removed = [job_id for job_id in old_catalog.position if job_id not in new_catalog.position]
+    prepared = []
+    for listener in job_catalog_listeners:
+        prepare = getattr(listener, "prepare_catalog_change", None)
+        prepared.append(prepare(new_catalog, upserted, removed) if prepare else None)
+    return new_catalog, upserted, removed, prepared
+
+def set_job_catalog(change: tuple):
+    """Swap in a prepared catalog snapshot and push the diff to derived indexes"""
+    global job_catalog
+    new_catalog, upserted, removed, prepared = change
+    job_catalog = new_catalog
+    for listener, state in zip(job_catalog_listeners, prepared):
+        listener.apply_catalog_change(new_catalog, upserted, removed, state)
+
+# Full-text job search: an in-process inverted index ranked with BM25. Postings
+# are kept per term and turned into NumPy arrays lazily, so a catalog change
+# only touches the terms of the jobs that changed.
+JOB_SEARCH_FIELDS = ("title", "company", "location", "description", "requirements", "benefits")
+JOB_SEARCH_STOPWORDS = frozenset(["a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "of", "on", "or", "the", "to", "with"])
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in JOB_SEARCH_STOPWORDS]
+
+def job_search_tokens(job: Dict[str, Any]) -> List[str]:
+    tokens = []
+    for field in JOB_SEARCH_FIELDS:
+        value = job.get(field)
+        if not value:
             continue
-        if job_type and job.job_type != job_type:
+        if isinstance(value, list):
+            value = " ".join(value)
+        tokens.extend(tokenize(value))
+    # Count title terms twice so a title match outranks a passing mention
+    tokens.extend(tokenize(job.get("title", "")))
+    return tokens
+
+class JobSearchIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._slots: Dict[str, int] = {}
+        self._job_ids: List[Optional[str]] = []
+        self._free_slots: List[int] = []
+        self._doc_terms: Dict[int, Dict[str, int]] = {}
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        self._total_len = 0
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._term_arrays: Dict[str, tuple] = {}
+        self._filter_masks: Dict[tuple, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self._slots)
+
+    def apply_catalog_change(self, catalog: JobCatalog, upserted, removed, prepared=None):
+        for job_id in removed:
+            self.remove(job_id)
+        for job in upserted:
+            self.add(job)
+        self._filter_masks.clear()
+
+    def add(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        if job_id in self._slots:
+            self.remove(job_id)
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._job_ids[slot] = job_id
+        else:
+            slot = len(self._job_ids)
+            self._job_ids.append(job_id)
+            if slot >= len(self._doc_len):
+                grown = np.zeros(max(64, 2 * len(self._doc_len)), dtype=np.float32)
+                grown[:len(self._doc_len)] = self._doc_len
+                self._doc_len = grown
+        self._slots[job_id] = slot
+        
+        term_counts: Dict[str, int] = {}
+        tokens = job_search_tokens(job)
+        for token in tokens:
+            term_counts[token] = term_counts.get(token, 0) + 1
+        for term, tf in term_counts.items():
+            self._postings.setdefault(term, {})[slot] = tf
+            self._term_arrays.pop(term, None)
+        self._doc_terms[slot] = term_counts
+        self._doc_len[slot] = len(tokens)
+        self._total_len += len(tokens)
+
+    def remove(self, job_id: str):
+        slot = self._slots.pop(job_id, None)
+        if slot is None:
+            return
+        for term in self._doc_terms.pop(slot):
+            postings = self._postings[term]
+            del postings[slot]
+            if not postings:
+                del self._postings[term]
+            self._term_arrays.pop(term, None)
+        self._total_len -= int(self._doc_len[slot])
+        self._doc_len[slot] = 0
+        self._job_ids[slot] = None
+        self._free_slots.append(slot)
+
+    def _term_postings(self, term: str):
+        arrays = self._term_arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return None
+            slots = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tfs = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            arrays = self._term_arrays[term] = (slots, tfs)
+        return arrays
+
+    def _filter_mask(self, catalog: JobCatalog, category: Optional[str], job_type: Optional[str]) -> np.ndarray:
+        key = (category, job_type)
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            mask = np.zeros(len(self._job_ids), dtype=bool)
+            for position in catalog.positions(category, job_type):
+                slot = self._slots.get(catalog.jobs[position]["id"])
+                if slot is not None:
+                    mask[slot] = True
+            self._filter_masks[key] = mask
+        return mask
+
+    def search(self, query: str, catalog: JobCatalog, category: Optional[str] = None, job_type: Optional[str] = None, limit: int = 20):
+        """Return (total matches, [(job_id, score), ...]) ranked by BM25"""
+        n_docs = len(self._slots)
+        terms = set(tokenize(query))
+        if not n_docs or not terms:
+            return 0, []
+        
+        size = len(self._job_ids)
+        doc_len = self._doc_len[:size]
+        avg_len = self._total_len / n_docs
+        length_norm = self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+        scores = np.zeros(size, dtype=np.float32)
+        for term in terms:
+            arrays = self._term_postings(term)
+            if arrays is None:
+                continue
+            slots, tfs = arrays
+            df = len(slots)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            scores[slots] += idf * tfs * (self.k1 + 1) / (tfs + length_norm[slots])
+        
+        if category or job_type:
+            scores[~self._filter_mask(catalog, category or None, job_type or None)] = 0
+        matches = np.flatnonzero(scores > 0)
+        if not len(matches):
+            return 0, []
+        if len(matches) > limit:
+            matches = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+        matches = matches[np.argsort(-scores[matches], kind="stable")]
+        return int(np.count_nonzero(scores > 0)), [(self._job_ids[slot], float(scores[slot])) for slot in matches]
+
+job_search_index = JobSearchIndex()
+job_search_index.apply_catalog_change(job_catalog, job_catalog.jobs, [])
+job_catalog_listeners.append(job_search_index)
+
+# Salary index. Free-text salaries are parsed once into annual GBP min/max
+# figures and kept in NumPy arrays sorted by each bound, so range filters are
+# two binary searches and salary ordering is a precomputed permutation.
+SALARY_PERIOD_MULTIPLIERS = (
+    (re.compile(r"\b(per\s+hour|an\s+hour|hourly|p/?h|/\s*h(ou)?r)\b"), 37.5 * 52),
+    (re.compile(r"\b(per\s+day|a\s+day|daily|p/?d|/\s*day)\b"), 5 * 52),
+    (re.compile(r"\b(per\s+week|a\s+week|weekly|p/?w|/\s*week)\b"), 52),
+    (re.compile(r"\b(per\s+month|a\s+month|monthly|pcm|p/?m|/\s*month)\b"), 12),
+)
+SALARY_AMOUNT_PATTERN = re.compile(r"(£\s*)?(\d[\d,]*(?:\.\d+)?)\s*(k\b)?", re.IGNORECASE)
+SALARY_SORTS = ("salary", "-salary")
+
+@lru_cache(maxsize=4096)
+def parse_salary(salary: Optional[str]):
+    """Parse free-text pay such as "£25 - £45 per hour" into annual (min, max)"""
+    if not salary:
+        return None
+    text = salary.lower()
+    matches = SALARY_AMOUNT_PATTERN.findall(text)
+    if any(currency for currency, _, _ in matches):
+        # Ignore stray numbers such as "10% bonus" when amounts are marked with £
+        matches = [match for match in matches if match[0]]
+    amounts = []
+    for _, number, thousands in matches:
+        value = float(number.replace(",", ""))
+        amounts.append(value * 1000 if thousands else value)
+    if not amounts:
+        return None
+    multiplier = 1
+    for pattern, period_multiplier in SALARY_PERIOD_MULTIPLIERS:
+        if pattern.search(text):
+            multiplier = period_multiplier
+            break
+    return min(amounts[:2]) * multiplier, max(amounts[:2]) * multiplier
+
+class SalaryIndex:
+    def __init__(self):
+        self.apply_catalog_change(JobCatalog(()), (), ())
+
+    def prepare_catalog_change(self, catalog: JobCatalog, upserted, removed) -> Dict[str, Any]:
+        parsed = [(i, parse_salary(job.get("salary"))) for i, job in enumerate(catalog.jobs)]
+        parsed = [(i, bounds) for i, bounds in parsed if bounds is not None]
+        positions = np.array([i for i, _ in parsed], dtype=np.int64)
+        mins = np.array([bounds[0] for _, bounds in parsed], dtype=np.float64)
+        maxs = np.array([bounds[1] for _, bounds in parsed], dtype=np.float64)
+        has_salary = np.zeros(len(catalog), dtype=bool)
+        has_salary[positions] = True
+        # Ties keep catalog order (stable sort), so pagination is deterministic
+        by_min = np.lexsort((positions, maxs, mins))
+        by_max = np.lexsort((positions, mins, maxs))
+        return {
+            "size": len(catalog), "has_salary": has_salary,
+            "by_min": positions[by_min], "min_sorted": mins[by_min],
+            "by_max": positions[by_max], "max_sorted": maxs[by_max],
+        }
+
+    def apply_catalog_change(self, catalog: JobCatalog, upserted, removed, prepared=None):
+        self.__dict__.update(prepared or self.prepare_catalog_change(catalog, upserted, removed))
+
+    def select(self, candidates: np.ndarray, min_salary: Optional[float] = None, max_salary: Optional[float] = None,
+               sort: Optional[str] = None) -> np.ndarray:
+        """Candidate positions whose salary range overlaps [min_salary, max_salary], optionally ordered by pay"""
+        keep = np.zeros(self.size, dtype=bool)
+        keep[candidates] = True
+        if min_salary is not None or max_salary is not None:
+            keep &= self.has_salary
+        if min_salary is not None:
+            # Jobs whose top of range reaches min_salary
+            in_range = np.zeros(self.size, dtype=bool)
+            in_range[self.by_max[np.searchsorted(self.max_sorted, min_salary, side="left"):]] = True
+            keep &= in_range
+        if max_salary is not None:
+            # Jobs whose bottom of range is within max_salary
+            in_range = np.zeros(self.size, dtype=bool)
+            in_range[self.by_min[:np.searchsorted(self.min_sorted, max_salary, side="right")]] = True
+            keep &= in_range
+        
+        if sort is None:
+            return np.flatnonzero(keep)
+        order = self.by_min if sort == "salary" else self.by_max[::-1]
+        selected = order[keep[order]]
+        # Jobs without a parseable salary go last
+        unsalaried = np.flatnonzero(keep & ~self.has_salary)
+        return np.concatenate((selected, unsalaried)) if len(unsalaried) else selected
+
+salary_index = SalaryIndex()
+salary_index.apply_catalog_change(job_catalog, job_catalog.jobs, [])
+job_catalog_listeners.append(salary_index)
+
+# Job recommendations. The catalog is turned into a sparse TF-IDF matrix once
+# per catalog version, stored column-major (term -> job rows), so scoring a
+# profile is a single scatter-add over the postings of the profile's terms
+# followed by argpartition for the top k. The matrix is built alongside the
+# catalog snapshot in the refresh worker thread; requests keep scoring against
+# the previous matrix until both are swapped in together.
+class JobRecommender:
+    def __init__(self):
+        self._catalog: Optional[JobCatalog] = None
+        self._matrix = None
+
+    def prepare_catalog_change(self, catalog: JobCatalog, upserted, removed) -> tuple:
+        return self._build(catalog)
+
+    def apply_catalog_change(self, catalog: JobCatalog, upserted, removed, prepared=None):
+        self._matrix = prepared or self._build(catalog)
+        self._catalog = catalog
+
+    @staticmethod
+    def _build(catalog: JobCatalog) -> tuple:
+        vocabulary: Dict[str, int] = {}
+        rows, cols, counts = [], [], []
+        for position, job in enumerate(catalog.jobs):
+            term_counts: Dict[str, int] = {}
+            for token in job_search_tokens(job):
+                term_counts[token] = term_counts.get(token, 0) + 1
+            for term, count in term_counts.items():
+                rows.append(position)
+                cols.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+        n_jobs, n_terms = len(catalog), len(vocabulary)
+        
+        df = np.bincount(cols, minlength=n_terms)
+        idf = np.log((1 + n_jobs) / (1 + df)) + 1
+        weights = (1 + np.log(np.array(counts, dtype=np.float64))) * idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_jobs))
+        weights /= norms[rows]
+        
+        order = np.argsort(cols, kind="stable")
+        col_ptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(df, out=col_ptr[1:])
+        return vocabulary, idf, col_ptr, rows[order], weights[order].astype(np.float32)
+
+    def recommend(self, catalog: JobCatalog, profile_text: List[str], limit: int = 10,
+                  candidates: Optional[np.ndarray] = None):
+        """Return (profile terms used, [(position, score), ...]) best match first"""
+        if self._catalog is not catalog:
+            # Only for catalogs that never went through set_job_catalog (e.g. benchmarks)
+            self.apply_catalog_change(catalog, catalog.jobs, ())
+        vocabulary, idf, col_ptr, row_idx, data = self._matrix
+        
+        term_counts: Dict[str, int] = {}
+        for text in profile_text:
+            for token in tokenize(text):
+                if token in vocabulary:
+                    term_counts[token] = term_counts.get(token, 0) + 1
+        if not term_counts:
+            return [], []
+        term_ids = np.array([vocabulary[term] for term in term_counts], dtype=np.int64)
+        query = (1 + np.log(np.array(list(term_counts.values()), dtype=np.float64))) * idf[term_ids]
+        query /= np.linalg.norm(query)
+        
+        # Sparse matrix-vector product restricted to the profile's columns
+        starts, ends = col_ptr[term_ids], col_ptr[term_ids + 1]
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        scores = np.bincount(row_idx[offsets], weights=data[offsets] * np.repeat(query, lengths), minlength=len(catalog))
+        if candidates is not None:
+            allowed = np.zeros(len(catalog), dtype=bool)
+            allowed[candidates] = True
+            scores[~allowed] = 0
+        
+        matches = np.flatnonzero(scores > 0)
+        if len(matches) > limit:
+            matches = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+        matches = matches[np.argsort(-scores[matches], kind="stable")]
+        top_terms = [term for _, term in sorted(zip(-query, term_counts))][:10]
+        return top_terms, [(int(position), float(scores[position])) for position in matches]
+
+job_recommender = JobRecommender()
+job_recommender.apply_catalog_change(job_catalog, job_catalog.jobs, [])
+job_catalog_listeners.append(job_recommender)
+
+# Featured jobs: bounded min-heaps of the most recent postings, overall and per
+# category, maintained from catalog diffs. A heap is only rebuilt from the
+# catalog when one of its members is removed or changed; each heap's response
+# is serialized once per change.
+FEATURED_JOBS_COUNT = int(os.environ.get("FEATURED_JOBS_COUNT", "3"))
+
+class RecentJobsTopK:
+    def __init__(self, k: int):
+        self.k = k
+        self._heaps: Dict[Optional[str], List[tuple]] = {}
+        self._members: Dict[str, tuple] = {}
+        self._responses: Dict[Optional[str], PrecomputedResponse] = {}
+        self.empty_response = None
+
+    def apply_catalog_change(self, catalog: JobCatalog, upserted, removed, prepared=None):
+        stale = set()
+        for job_id in removed:
+            stale.update(self._members.get(job_id, ()))
+        for job in upserted:
+            keys = (None, job["category"])
+            previous = self._members.get(job["id"])
+            if previous is not None:
+                # A member changed in place; its old entry can't be located cheaply
+                stale.update(previous)
+                stale.update(keys)
+                continue
+            for key in keys:
+                if key not in stale:
+                    self._push(key, job)
+        for key in stale:
+            self._rebuild(catalog, key)
+
+    def _push(self, key: Optional[str], job: Dict[str, Any]):
+        heap = self._heaps.setdefault(key, [])
+        entry = (job["posted_date"], job["id"])
+        if len(heap) < self.k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            evicted = heapq.heapreplace(heap, entry)
+            self._forget(evicted[1], key)
+        else:
+            return
+        self._members[job["id"]] = self._members.get(job["id"], ()) + (key,)
+        self._responses.pop(key, None)
+
+    def _forget(self, job_id: str, key: Optional[str]):
+        keys = tuple(k for k in self._members.get(job_id, ()) if k != key)
+        if keys:
+            self._members[job_id] = keys
+        else:
+            self._members.pop(job_id, None)
+
+    def _rebuild(self, catalog: JobCatalog, key: Optional[str]):
+        for _, job_id in self._heaps.pop(key, []):
+            self._forget(job_id, key)
+        self._responses.pop(key, None)
+        jobs = catalog.jobs if key is None else catalog.by_category.get(key, ())
+        for job in heapq.nlargest(self.k, jobs, key=lambda job: (job["posted_date"], job["id"])):
+            self._push(key, job)
+
+    def featured(self, catalog: JobCatalog, category: Optional[str] = None) -> PrecomputedResponse:
+        if category is not None and category not in self._heaps:
+            if self.empty_response is None:
+                self.empty_response = PrecomputedResponse({"featured_jobs": []})
+            return self.empty_response
+        response = self._responses.get(category)
+        if response is None:
+            entries = sorted(self._heaps.get(category, []), reverse=True)
+            response = self._responses[category] = PrecomputedResponse(
+                {"featured_jobs": [catalog.get(job_id) for _, job_id in entries]}
+            )
+        return response
+
+featured_jobs = RecentJobsTopK(FEATURED_JOBS_COUNT)
+featured_jobs.apply_catalog_change(job_catalog, job_catalog.jobs, [])
+job_catalog_listeners.append(featured_jobs)
+
+# "Jobs near me". Locations are geocoded against a bundled offline gazetteer
+# and bucketed into a fixed lat/lon grid, so a radius query only inspects the
+# cells overlapping the search circle. Remote postings have no coordinates.
+GAZETTEER_PATH = Path(os.environ.get("GAZETTEER_PATH", str(ROOT_DIR / "data" / "gazetteer.csv")))
+GEO_CELL_DEGREES = 0.1
+GEO_LONGITUDE_CELLS = round(360 / GEO_CELL_DEGREES)
+MAX_RADIUS_KM = 200.0
+EARTH_RADIUS_KM = 6371.0088
+REMOTE_PATTERN = re.compile(r"\bremote\b", re.IGNORECASE)
+COORDINATES_PATTERN = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+def normalize_place(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", name.lower()).strip()
+
+def load_gazetteer(path: Path) -> Dict[str, tuple]:
+    gazetteer = {}
+    try:
+        with open(path, newline="", encoding="utf-8") as places:
+            for row in csv.DictReader(places):
+                gazetteer[normalize_place(row["name"])] = (float(row["latitude"]), float(row["longitude"]))
+    except FileNotFoundError:
+        logging.getLogger(__name__).warning(f"Gazetteer not found at {path}; location search disabled")
+    return gazetteer
+
+GAZETTEER = load_gazetteer(GAZETTEER_PATH)
+
+@lru_cache(maxsize=4096)
+def geocode_location(location: str):
+    """Coordinates for a job location, "remote" for remote postings, or None"""
+    if REMOTE_PATTERN.search(location):
+        return "remote"
+    # Most specific part first: "Castleton, Peak District" -> Castleton
+    for part in [*location.split(","), location]:
+        coordinates = GAZETTEER.get(normalize_place(re.sub(r"\(.*?\)", "", part)))
+        if coordinates:
+            return coordinates
+    return None
+
+def resolve_place(near: str) -> tuple:
+    match = COORDINATES_PATTERN.match(near)
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+    coordinates = GAZETTEER.get(normalize_place(near))
+    if coordinates is None:
+        raise HTTPException(status_code=400, detail=f"Unknown location: {near}")
+    return coordinates
+
+class JobGeoIndex:
+    def __init__(self):
+        self.apply_catalog_change(JobCatalog(()), (), ())
+
+    def prepare_catalog_change(self, catalog: JobCatalog, upserted, removed) -> Dict[str, Any]:
+        size = len(catalog)
+        latitudes = np.full(size, np.nan)
+        longitudes = np.full(size, np.nan)
+        is_remote = np.zeros(size, dtype=bool)
+        cells: Dict[tuple, List[int]] = {}
+        for position, job in enumerate(catalog.jobs):
+            coordinates = geocode_location(job.get("location") or "")
+            if coordinates == "remote":
+                is_remote[position] = True
+            elif coordinates is not None:
+                latitudes[position], longitudes[position] = coordinates
+                cells.setdefault(self._cell(*coordinates), []).append(position)
+        return {
+            "size": size, "latitudes": latitudes, "longitudes": longitudes, "is_remote": is_remote,
+            "_cells": {cell: np.array(positions, dtype=np.int64) for cell, positions in cells.items()},
+        }
+
+    def apply_catalog_change(self, catalog: JobCatalog, upserted, removed, prepared=None):
+        self.__dict__.update(prepared or self.prepare_catalog_change(catalog, upserted, removed))
+
+    @staticmethod
+    def _cell(latitude: float, longitude: float) -> tuple:
+        return math.floor(latitude / GEO_CELL_DEGREES), JobGeoIndex._wrap(math.floor(longitude / GEO_CELL_DEGREES))
+
+    @staticmethod
+    def _wrap(lon_cell: int) -> int:
+        # Longitude cells wrap at the antimeridian: 180°E is the same cell as 180°W
+        return (lon_cell + GEO_LONGITUDE_CELLS // 2) % GEO_LONGITUDE_CELLS - GEO_LONGITUDE_CELLS // 2
+
+    def within(self, latitude: float, longitude: float, radius_km: float, candidates: np.ndarray):
+        """Candidate positions within radius_km, nearest first, with their distances"""
+        lat_span = radius_km / 111.0
+        # Near the poles the circle spans every longitude
+        lon_span = min(radius_km / max(111.32 * math.cos(math.radians(latitude)), 1e-6), 180.0)
+        lat_cells = range(math.floor((latitude - lat_span) / GEO_CELL_DEGREES), math.floor((latitude + lat_span) / GEO_CELL_DEGREES) + 1)
+        if lon_span >= 180.0:
+            lon_cells = None
+        else:
+            lon_cells = {
+                self._wrap(j) for j in range(
+                    math.floor((longitude - lon_span) / GEO_CELL_DEGREES), math.floor((longitude + lon_span) / GEO_CELL_DEGREES) + 1
+                )
+            }
+        if lon_cells is not None and len(lat_cells) * len(lon_cells) <= len(self._cells):
+            nearby = [self._cells[(i, j)] for i in lat_cells for j in lon_cells if (i, j) in self._cells]
+        else:
+            # Fewer occupied cells than cells in the box: scan those instead
+            nearby = [
+                positions for (i, j), positions in self._cells.items()
+                if i in lat_cells and (lon_cells is None or j in lon_cells)
+            ]
+        if not nearby:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        allowed = np.zeros(self.size, dtype=bool)
+        allowed[candidates] = True
+        positions = np.concatenate(nearby)
+        positions = positions[allowed[positions]]
+        
+        lat1, lon1 = math.radians(latitude), math.radians(longitude)
+        lat2, lon2 = np.radians(self.latitudes[positions]), np.radians(self.longitudes[positions])
+        a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        inside = distances <= radius_km
+        positions, distances = positions[inside], distances[inside]
+        order = np.lexsort((positions, distances))
+        return positions[order], distances[order]
+
+job_geo_index = JobGeoIndex()
+job_geo_index.apply_catalog_change(job_catalog, job_catalog.jobs, [])
+job_catalog_listeners.append(job_geo_index)
+
+# Job feed ingestion. Feeds are streamed from disk in fixed-size batches, so
+# memory stays flat regardless of feed size: each batch is read and validated
+# against JobListing in a worker thread while the previous batch is written
+# with an unordered bulk_write.
+JOB_FEED_DIR = Path(os.environ.get("JOB_FEED_DIR", str(ROOT_DIR / "feeds"))).resolve()
+JOB_FEED_BATCH_SIZE = int(os.environ.get("JOB_FEED_BATCH_SIZE", "1000"))
+JOB_CATALOG_REFRESH_SECONDS = float(os.environ.get("JOB_CATALOG_REFRESH_SECONDS", "60"))
+# Users allowed to run feed ingestion and read /api/metrics; none by default
+ADMIN_USERNAMES = frozenset(name.strip() for name in os.environ.get("ADMIN_USERNAMES", "").split(",") if name.strip())
+JOB_LIST_FIELDS = ("requirements", "benefits")
+
+def iter_job_feed(path: Path):
+    """Yield (line_number, row) from a JSONL or CSV feed without loading it whole"""
+    suffix = path.suffix.lower()
+    with open(path, newline="", encoding="utf-8") as feed:
+        if suffix == ".csv":
+            # CSV rows start on line 2, after the header
+            for line_number, row in enumerate(csv.DictReader(feed), start=2):
+                try:
+                    for field in JOB_LIST_FIELDS:
+                        value = row.get(field)
+                        if isinstance(value, str):
+                            value = value.strip()
+                            row[field] = json.loads(value) if value.startswith("[") else [part.strip() for part in value.split("|") if part.strip()]
+                except ValueError as e:
+                    yield line_number, e
+                    continue
+                yield line_number, {key: value for key, value in row.items() if value not in (None, "")}
+        elif suffix in (".jsonl", ".ndjson", ".json"):
+            for line_number, line in enumerate(feed, start=1):
+                line = line.strip()
+                if line:
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError as e:
+                        yield line_number, e
+        else:
+            raise ValueError(f"Unsupported feed format: {suffix or path.name}")
+
+def build_job_upserts(rows):
+    """Validate a batch of feed rows into upsert operations"""
+    operations = []
+    errors = []
+    for line_number, row in rows:
+        try:
+            if isinstance(row, Exception):
+                raise row
+            if not isinstance(row, dict):
+                raise TypeError(f"expected a JSON object, got {type(row).__name__}")
+            if not row.get("id"):
+                row["id"] = stable_id(str(row.get("company")), str(row.get("title")), str(row.get("location")))
+            job = JobListing(**row).dict()
+        except (ValueError, TypeError) as e:
+            errors.append({"line": line_number, "error": str(e).splitlines()[0]})
             continue
-        jobs.append(job.dict())
+        # Stamped by the server when the write is applied, not when the batch was
+        # built, so a slow batch can't land behind the catalog watermark
+        operations.append(UpdateOne({"id": job["id"]}, {"$set": job, "$currentDate": {"updated_at": True}}, upsert=True))
+    return operations, errors
+
+async def ingest_job_feed(path: Path, batch_size: int = JOB_FEED_BATCH_SIZE, progress=None) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    rows = iter_job_feed(path)
+    stats = {"feed": str(path), "rows_read": 0, "rows_valid": 0, "rows_invalid": 0, "upserted": 0, "modified": 0, "errors": []}
+    started_at = time.perf_counter()
+    
+    def read_batch():
+        batch = list(itertools.islice(rows, batch_size))
+        return len(batch), build_job_upserts(batch)
+    
+    pending = loop.run_in_executor(None, read_batch)
+    while True:
+        row_count, (operations, errors) = await pending
+        if not row_count:
+            break
+        pending = loop.run_in_executor(None, read_batch)
+        stats["rows_read"] += row_count
+        stats["rows_valid"] += len(operations)
+        stats["rows_invalid"] += len(errors)
+        stats["errors"] = (stats["errors"] + errors)[:20]
+        if operations:
+            result = await db.jobs.bulk_write(operations, ordered=False)
+            stats["upserted"] += result.upserted_count
+            stats["modified"] += result.modified_count
+        if progress:
+            progress(stats)
+    
+    elapsed = time.perf_counter() - started_at
+    stats["elapsed_seconds"] = round(elapsed, 3)
+    stats["rows_per_second"] = round(stats["rows_read"] / elapsed, 1) if elapsed > 0 else 0
+    return stats
+
+# The jobs collection is the source of truth; job_catalog is a per-worker cache
+# of it, refreshed at most every JOB_CATALOG_REFRESH_SECONDS by pulling only
+# documents updated since the last refresh; deletions are found by diffing the
+# cached ids against the id index. Refreshes run as a background task
+# and build the new snapshot in a worker thread, so requests keep reading the
+# previous catalog until it is swapped in.
+JOB_CATALOG_WATERMARK_OVERLAP = timedelta(seconds=5)
+job_catalog_state = {"refreshed_at": 0.0, "watermark": None, "task": None}
+job_catalog_lock = asyncio.Lock()
+
+async def seed_jobs_collection():
+    if await db.jobs.find_one({}, {"_id": 1}):
+        return
+    operations, _ = build_job_upserts(enumerate(JobCatalog.from_records(SAMPLE_JOBS).jobs))
+    await db.jobs.bulk_write(operations, ordered=False)
+
+async def fetch_job_documents(query: Dict[str, Any]):
+    documents = {}
+    newest = None
+    async for doc in db.jobs.find(query, {"_id": 0}):
+        updated_at = doc.pop("updated_at", None)
+        if updated_at and (newest is None or updated_at > newest):
+            newest = updated_at
+        documents[doc["id"]] = doc
+    return documents, newest
+
+async def fetch_job_ids() -> set:
+    # Sorting by id lets the id index cover the query, so only index keys are read
+    return {doc["id"] async for doc in db.jobs.find({}, {"_id": 0, "id": 1}).sort("id", ASCENDING)}
+
+async def refresh_job_catalog(force: bool = False) -> JobCatalog:
+    async with job_catalog_lock:
+        if not force and time.monotonic() - job_catalog_state["refreshed_at"] < JOB_CATALOG_REFRESH_SECONDS:
+            return job_catalog
+        try:
+            watermark = job_catalog_state["watermark"]
+            if watermark is not None:
+                # Overlap the watermark so writes that committed out of order are not missed
+                changed, newest = await fetch_job_documents(
+                    {"updated_at": {"$gt": watermark - JOB_CATALOG_WATERMARK_OVERLAP}}
+                )
+                live_ids = await fetch_job_ids()
+                modified = any(job_catalog.get(job_id) != doc for job_id, doc in changed.items())
+                kept = [changed.pop(job["id"], job) for job in job_catalog.jobs if job["id"] in live_ids]
+                # Cached jobs whose id is no longer in the collection were deleted
+                modified = modified or len(kept) < len(job_catalog)
+                jobs = kept + list(changed.values())
+            if watermark is None:
+                documents, newest = await fetch_job_documents({})
+                jobs = list(documents.values())
+                modified = True
+            if modified:
+                change = await asyncio.get_running_loop().run_in_executor(None, prepare_job_catalog, job_catalog, jobs)
+                set_job_catalog(change)
+            job_catalog_state["watermark"] = newest or job_catalog_state["watermark"]
+        except PyMongoError as e:
+            # Keep serving the cached catalog and retry after the next interval
+            logger.error(f"Job catalog refresh failed: {e}")
+        job_catalog_state["refreshed_at"] = time.monotonic()
+        return job_catalog
+
+async def get_job_catalog() -> JobCatalog:
+    if (time.monotonic() - job_catalog_state["refreshed_at"] >= JOB_CATALOG_REFRESH_SECONDS
+            and job_catalog_state["task"] is None):
+        task = job_catalog_state["task"] = asyncio.create_task(refresh_job_catalog())
+        task.add_done_callback(lambda _: job_catalog_state.update(task=None))
+    return job_catalog
+
+async def get_admin_user(current_user: "User" = Depends(get_current_user)):
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+# Job listings endpoints
+@api_router.get("/jobs/listings")
+async def get_job_listings(category: Optional[str] = None, job_type: Optional[str] = None,
+                           min_salary: Optional[float] = None, max_salary: Optional[float] = None, sort: Optional[str] = None,
+                           near: Optional[str] = None, radius_km: float = 25.0, include_remote: bool = False,
+                           limit: Optional[int] = None, after: Optional[str] = None, fields: Optional[str] = None):
+    if sort is not None and sort not in SALARY_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SALARY_SORTS)}")
+    if min_salary is not None and max_salary is not None and min_salary > max_salary:
+        raise HTTPException(status_code=400, detail="min_salary cannot exceed max_salary")
+    if near is not None and sort is not None:
+        raise HTTPException(status_code=400, detail="near results are sorted by distance; sort cannot be combined with near")
+    if radius_km <= 0 or radius_km > MAX_RADIUS_KM:
+        raise HTTPException(status_code=400, detail=f"radius_km must be between 0 and {MAX_RADIUS_KM:g}")
+    origin = resolve_place(near) if near is not None else None
+    catalog = await get_job_catalog()
+    projection = parse_fields(fields, JobListing)
+    positions = catalog.positions(category, job_type)
+    distances = {}
+    if min_salary is not None or max_salary is not None or sort is not None or origin is not None:
+        candidates = catalog.position_array(category, job_type)
+        if min_salary is not None or max_salary is not None or sort is not None:
+            candidates = salary_index.select(candidates, min_salary, max_salary, sort)
+        if origin is not None:
+            nearby, nearby_distances = job_geo_index.within(origin[0], origin[1], radius_km, candidates)
+            distances = dict(zip(nearby.tolist(), np.round(nearby_distances, 2).tolist()))
+            if include_remote:
+                # Remote postings have no distance; list them after the local ones
+                nearby = np.concatenate((nearby, candidates[job_geo_index.is_remote[candidates]]))
+            candidates = nearby
+        positions = candidates.tolist()
+    page, next_cursor = paginate_positions(
+        positions, catalog.jobs, catalog.position, page_size(limit, after), after,
+        ascending=sort is None and origin is None
+    )
+    jobs = [project_fields(catalog.jobs[i], projection) for i in page]
+    if origin is not None:
+        jobs = [{**job, "distance_km": distances.get(i)} for i, job in zip(page, jobs)]
     
     return {
         "jobs": jobs,
-        "total": len(jobs),
-        "categories": list(set([job["category"] for job in [JobListing(**j).dict() for j in SAMPLE_JOBS]])),
-        "job_types": list(set([job["job_type"] for job in [JobListing(**j).dict() for j in SAMPLE_JOBS]]))
+        "total": len(positions),
+        "next_cursor": next_cursor,
+        "categories": list(catalog.categories),
+        "job_types": list(catalog.job_types)
+    }
+
+@api_router.get("/jobs/search")
+async def search_jobs(q: str, category: Optional[str] = None, job_type: Optional[str] = None, limit: int = 20):
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    catalog = await get_job_catalog()
+    total, ranked = job_search_index.search(q, catalog, category, job_type, limit)
+    
+    return {
+        "query": q,
+        "jobs": [{**catalog.get(job_id), "score": round(score, 4)} for job_id, score in ranked],
+        "total": total
+    }
+
+@api_router.get("/jobs/recommended")
+async def get_recommended_jobs(current_user: User = Depends(get_current_user), limit: int = 10,
+                               category: Optional[str] = None, job_type: Optional[str] = None):
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    
+    # Profile: stored skills (counted twice) plus the user's employment progress items
+    profile_text = current_user.skills * 2
+    employment_items = await db.progress_items.find(
+        {"user_id": current_user.id, "category": "Employment"},
+        {"_id": 0, "title": 1, "description": 1, "notes": 1, "subtasks": 1}
+    ).to_list(length=None)
+    for item in employment_items:
+        profile_text.extend([item.get("title") or "", item.get("description") or "", item.get("notes") or ""])
+        profile_text.extend(subtask.get("task", "") for subtask in item.get("subtasks", []))
+    
+    # Fetched after the last await so the catalog matches the recommender's matrix
+    catalog = await get_job_catalog()
+    candidates = catalog.position_array(category, job_type) if category or job_type else None
+    profile_terms, ranked = job_recommender.recommend(catalog, profile_text, limit, candidates)
+    
+    return {
+        "jobs": [{**catalog.jobs[position], "match_score": round(score, 4)} for position, score in ranked],
+        "total": len(ranked),
+        "profile_terms": profile_terms
     }
 
 @api_router.get("/jobs/featured")
-async def get_featured_jobs():
-    # Return top 3 most recent jobs
-    featured = sorted(SAMPLE_JOBS, key=lambda x: x["posted_date"], reverse=True)[:3]
-    return {"featured_jobs": [JobListing(**job).dict() for job in featured]}
+async def get_featured_jobs(request: Request, category: Optional[str] = None):
+    # Most recent jobs, overall or within a category
+    catalog = await get_job_catalog()
+    return featured_jobs.featured(catalog, category or None).respond(request, cache_control="no-cache")
 
 @api_router.get("/jobs/categories")
 async def get_job_categories():
-    categories = {}
-    for job_data in SAMPLE_JOBS:
-        job = JobListing(**job_data)
-        if job.category not in categories:
-            categories[job.category] = []
-        categories[job.category].append(job.dict())
-    
-    return categories
+    catalog = await get_job_catalog()
+    return {category: list(jobs) for category, jobs in catalog.by_category.items()}
+
+class JobFeedIngestRequest(BaseModel):
+    path: str
+    batch_size: int = JOB_FEED_BATCH_SIZE
+
+job_ingest_runs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+job_ingest_tasks = set()
+
+def resolve_job_feed_path(relative_path: str) -> Path:
+    path = (JOB_FEED_DIR / relative_path).resolve()
+    if JOB_FEED_DIR not in path.parents:
+        raise HTTPException(status_code=400, detail="Feed path must be inside the configured feed directory")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Feed file not found")
+    return path
+
+async def run_job_ingest(run_id: str, path: Path, batch_size: int):
+    run = job_ingest_runs[run_id]
+    try:
+        run["stats"] = await ingest_job_feed(path, batch_size, progress=lambda stats: run.update(stats=dict(stats)))
+        await refresh_job_catalog(force=True)
+        run["status"] = "completed"
+    except Exception as e:
+        logger.exception(f"Job feed ingestion {run_id} failed")
+        run["status"] = "failed"
+        run["error"] = str(e)
+    run["finished_at"] = datetime.utcnow()
+
+@api_router.post("/admin/jobs/ingest", status_code=status.HTTP_202_ACCEPTED)
+async def start_job_ingest(ingest_request: JobFeedIngestRequest, admin_user: User = Depends(get_admin_user)):
+    if ingest_request.batch_size < 1 or ingest_request.batch_size > 10000:
+        raise HTTPException(status_code=400, detail="batch_size must be between 1 and 10000")
+    path = resolve_job_feed_path(ingest_request.path)
+    run_id = str(uuid.uuid4())
+    job_ingest_runs[run_id] = {"id": run_id, "status": "running", "feed": ingest_request.path, "started_at": datetime.utcnow(), "stats": None}
+    while len(job_ingest_runs) > 20:
+        job_ingest_runs.popitem(last=False)
+    task = asyncio.create_task(run_job_ingest(run_id, path, ingest_request.batch_size))
+    job_ingest_tasks.add(task)
+    task.add_done_callback(job_ingest_tasks.discard)
+    return job_ingest_runs[run_id]
+
+@api_router.get("/admin/jobs/ingest/{run_id}")
+async def get_job_ingest(run_id: str, admin_user: User = Depends(get_admin_user)):
+    run = job_ingest_runs.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Ingestion run not found")
+    return run
 
 # Visa requirements endpoints
+VISA_RECORDS = tuple(VisaRequirement(**{"id": stable_id(req["visa_type"]), **req}).dict() for req in VISA_REQUIREMENTS)
+
+def visa_slugs(visa_type: str) -> List[str]:
+    # The original slug keeps characters such as "/" ("spouse/family-visa"),
+    # so also accept a URL-safe form ("spouse-family-visa")
+    legacy = visa_type.lower().replace(" ", "-")
+    url_safe = re.sub(r"[^a-z0-9]+", "-", visa_type.lower()).strip("-")
+    return [legacy] if url_safe == legacy else [legacy, url_safe]
+
+VISA_BY_SLUG = {slug: record for record in VISA_RECORDS for slug in visa_slugs(record["visa_type"])}
+
 @api_router.get("/visa/requirements")
-async def get_visa_requirements():
-    return {"visa_types": [VisaRequirement(**req).dict() for req in VISA_REQUIREMENTS]}
+async def get_visa_requirements(request: Request):
+    return precomputed_response(request, "visa/requirements", lambda: {"visa_types": list(VISA_RECORDS)})
 
 @api_router.get("/visa/requirements/{visa_type}")
 async def get_visa_requirement_details(visa_type: str):
-    for req in VISA_REQUIREMENTS:
-        if req["visa_type"].lower().replace(" ", "-") == visa_type.lower():
-            return VisaRequirement(**req).dict()
-    raise HTTPException(status_code=404, detail="Visa type not found")
+    record = VISA_BY_SLUG.get(visa_type.lower())
+    if record is None:
+        raise HTTPException(status_code=404, detail="Visa type not found")
+    return record
 
-@api_router.get("/visa/checklist")
-async def get_visa_checklist():
+# Visa eligibility. Each visa's free-text eligibility list is compiled once into
+# structured criteria over ApplicantProfile fields; criteria that no rule
+# understands are reported for manual review instead of being guessed.
+CEFR_LEVELS = ("A1", "A2", "B1", "B2", "C1", "C2")
+MAX_ELIGIBILITY_BATCH = 1000
+
+class ApplicantProfile(BaseModel):
+    applicant_id: Optional[str] = None
+    has_sponsored_job_offer: Optional[bool] = None
+    has_student_sponsor_offer: Optional[bool] = None
+    job_skill_level: Optional[int] = None  # RQF level of the offered role
+    salary: Optional[float] = None  # annual GBP
+    english_level: Optional[str] = Field(default=None, pattern="^[ABC][12]$")  # CEFR
+    relationship_with_settled_person: Optional[bool] = None
+    relationship_genuine: Optional[bool] = None
+    meets_financial_requirement: Optional[bool] = None
+    has_adequate_accommodation: Optional[bool] = None
+    has_sufficient_funds: Optional[bool] = None
+    intends_temporary_stay: Optional[bool] = None
+    intends_to_work: Optional[bool] = None
+    good_immigration_history: Optional[bool] = None
+    genuine_intention: Optional[bool] = None
+    academic_progression: Optional[bool] = None
+
+class EligibilityRequest(BaseModel):
+    applicants: List[ApplicantProfile]
+    visa_types: Optional[List[str]] = None
+
+def _amount(text: str) -> float:
+    return float(text.replace(",", ""))
+
+# (pattern, field, operator, value or function of the match); first match wins
+ELIGIBILITY_RULES = [
+    (re.compile(r"salary.*?£\s*([\d,]+)", re.IGNORECASE), "salary", ">=", lambda m: _amount(m.group(1))),
+    (re.compile(r"RQF level\s*(\d)", re.IGNORECASE), "job_skill_level", ">=", lambda m: int(m.group(1))),
+    (re.compile(r"english.*?\b([ABC][12])\b", re.IGNORECASE), "english_level", ">=", lambda m: m.group(1).upper()),
+    (re.compile(r"english", re.IGNORECASE), "english_level", "present", None),
+    (re.compile(r"student sponsor", re.IGNORECASE), "has_student_sponsor_offer", "==", True),
+    (re.compile(r"sponsor licen[cs]e|licensed sponsor|approved employer", re.IGNORECASE), "has_sponsored_job_offer", "==", True),
+    (re.compile(r"no intention to work", re.IGNORECASE), "intends_to_work", "==", False),
+    (re.compile(r"married|civil partnership", re.IGNORECASE), "relationship_with_settled_person", "==", True),
+    (re.compile(r"genuine and subsisting", re.IGNORECASE), "relationship_genuine", "==", True),
+    (re.compile(r"financial requirement must", re.IGNORECASE), "meets_financial_requirement", "==", True),
+    (re.compile(r"accommodation", re.IGNORECASE), "has_adequate_accommodation", "==", True),
+    (re.compile(r"sufficient funds|financial requirements met", re.IGNORECASE), "has_sufficient_funds", "==", True),
+    (re.compile(r"visit temporarily|leave at end", re.IGNORECASE), "intends_temporary_stay", "==", True),
+    (re.compile(r"immigration history", re.IGNORECASE), "good_immigration_history", "==", True),
+    (re.compile(r"academic progression", re.IGNORECASE), "academic_progression", "==", True),
+    (re.compile(r"genuine.*intention|genuine student", re.IGNORECASE), "genuine_intention", "==", True),
+]
+
+def compile_eligibility(text: str) -> Optional[Dict[str, Any]]:
+    for pattern, field, operator, value in ELIGIBILITY_RULES:
+        match = pattern.search(text)
+        if match:
+            return {"criterion": text, "field": field, "operator": operator, "value": value(match) if callable(value) else value}
+    return None
+
+def criterion_passes(criterion: Dict[str, Any], actual: Any) -> bool:
+    operator, expected = criterion["operator"], criterion["value"]
+    if operator == "present":
+        return True
+    if operator == "==":
+        return actual == expected
+    if criterion["field"] == "english_level":
+        return CEFR_LEVELS.index(actual) >= CEFR_LEVELS.index(expected)
+    return actual >= expected
+
+VISA_ELIGIBILITY = {}
+for record in VISA_RECORDS:
+    compiled = [(text, compile_eligibility(text)) for text in record["eligibility"]]
+    VISA_ELIGIBILITY[visa_slugs(record["visa_type"])[-1]] = {
+        "visa_type": record["visa_type"],
+        "criteria": [criterion for _, criterion in compiled if criterion is not None],
+        "manual_review": [text for text, criterion in compiled if criterion is None]
+    }
+
+def evaluate_eligibility(profile: Dict[str, Any], slug: str) -> Dict[str, Any]:
+    visa = VISA_ELIGIBILITY[slug]
+    failed, missing = [], []
+    for criterion in visa["criteria"]:
+        actual = profile.get(criterion["field"])
+        if actual is None:
+            missing.append(criterion["criterion"])
+        elif not criterion_passes(criterion, actual):
+            failed.append(criterion["criterion"])
+    if failed:
+        result = "ineligible"
+    elif missing:
+        result = "incomplete"
+    elif visa["manual_review"]:
+        result = "manual_review"
+    else:
+        result = "eligible"
     return {
-        "general_documents": [
-            "Valid passport (6+ months remaining)",
-            "Passport-style photographs",
-            "Completed visa application form",
-            "Visa application fee payment",
-            "Biometric information"
-        ],
-        "financial_documents": [
-            "Bank statements (6 months)",
-            "Salary slips or employment letter",
-            "Tax returns",
-            "Sponsor financial documents (if applicable)"
-        ],
-        "identity_documents": [
-            "Birth certificate",
-            "Marriage certificate (if applicable)",
-            "Previous passports",
-            "Police clearance certificate"
-        ],
-        "supporting_documents": [
-            "TB test results (if required)",
-            "English language test certificate",
-            "Academic qualifications",
-            "Employment contracts or job offers"
-        ]
+        "visa_type": visa["visa_type"],
+        "slug": slug,
+        "status": result,
+        "failed": failed,
+        "missing": missing,
+        "manual_review": visa["manual_review"]
     }
 
-# Timeline and Progress endpoints
-@api_router.get("/timeline/full")
-async def get_full_timeline(current_user: User = Depends(get_current_user)):
-    user_completed_steps = current_user.completed_steps
-    timeline_with_status = []
+@api_router.post("/visa/eligibility")
+async def evaluate_visa_eligibility(eligibility_request: EligibilityRequest, current_user: User = Depends(get_current_user)):
+    if len(eligibility_request.applicants) > MAX_ELIGIBILITY_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_ELIGIBILITY_BATCH} applicants per request")
+    slugs = list(VISA_ELIGIBILITY)
+    if eligibility_request.visa_types:
+        slugs = []
+        for visa_type in eligibility_request.visa_types:
+            record = VISA_BY_SLUG.get(visa_type.lower())
+            if record is None:
+                raise HTTPException(status_code=404, detail=f"Visa type not found: {visa_type}")
+            slugs.append(visa_slugs(record["visa_type"])[-1])
     
-    for step in RELOCATION_TIMELINE:
-        step_copy = step.copy()
-        step_copy["is_completed"] = step["id"] in user_completed_steps
-        timeline_with_status.append(step_copy)
+    results = []
+    for index, applicant in enumerate(eligibility_request.applicants):
+        profile = applicant.dict()
+        visas = [evaluate_eligibility(profile, slug) for slug in slugs]
+        results.append({
+            "index": index,
+            "applicant_id": applicant.applicant_id,
+            "eligible_visa_types": [visa["visa_type"] for visa in visas if visa["status"] == "eligible"],
+            "visas": visas
+        })
+    
+    return {
+        "results": results,
+        "total_applicants": len(results),
+        "criteria": {slug: VISA_ELIGIBILITY[slug]["criteria"] for slug in slugs}
+    }
+
+VISA_CHECKLIST = {
+    "general_documents": [
+        "Valid passport (6+ months remaining)",
+        "Passport-style photographs",
+        "Completed visa application form",
+        "Visa application fee payment",
+        "Biometric information"
+    ],
+    "financial_documents": [
+        "Bank statements (6 months)",
+        "Salary slips or employment letter",
+        "Tax returns",
+        "Sponsor financial documents (if applicable)"
+    ],
+    "identity_documents": [
+        "Birth certificate",
+        "Marriage certificate (if applicable)",
+        "Previous passports",
+        "Police clearance certificate"
+    ],
+    "supporting_documents": [
+        "TB test results (if required)",
+        "English language test certificate",
+        "Academic qualifications",
+        "Employment contracts or job offers"
+    ]
+}
+
+@api_router.get("/visa/checklist")
+async def get_visa_checklist(request: Request):
+    return precomputed_response(request, "visa/checklist", lambda: VISA_CHECKLIST)
+
+# Timeline and Progress endpoints
+def build_full_timeline(mask: int) -> Dict[str, Any]:
+    completed_count = mask.bit_count()
     
     return {
-        "timeline": timeline_with_status,
+        "timeline": [states[mask & bit != 0] for bit, states in TIMELINE_STEP_STATES],
         "total_steps": len(RELOCATION_TIMELINE),
-        "completed_steps": len(user_completed_steps),
-        "completion_percentage": (len(user_completed_steps) / len(RELOCATION_TIMELINE)) * 100,
-        "current_phase": get_current_phase(user_completed_steps)
+        "completed_steps": completed_count,
+        "completion_percentage": (completed_count / len(RELOCATION_TIMELINE)) * 100,
+        "current_phase": get_current_phase(mask)
     }
 
-@api_router.get("/timeline/by-category")
-async def get_timeline_by_category(current_user: User = Depends(get_current_user)):
-    user_completed_steps = current_user.completed_steps
+def build_timeline_by_category(mask: int) -> Dict[str, Any]:
     categories = {}
     
-    for step in RELOCATION_TIMELINE:
-        category = step["category"]
-        if category not in categories:
-            categories[category] = {
-                "name": category,
-                "steps": [],
-                "total_steps": 0,
-                "completed_steps": 0
-            }
-        
-        step_copy = step.copy()
-        step_copy["is_completed"] = step["id"] in user_completed_steps
-        categories[category]["steps"].append(step_copy)
-        categories[category]["total_steps"] += 1
-        
-        if step["id"] in user_completed_steps:
-            categories[category]["completed_steps"] += 1
-    
-    # Calculate completion percentage for each category
-    for category in categories.values():
-        if category["total_steps"] > 0:
-            category["completion_percentage"] = (category["completed_steps"] / category["total_steps"]) * 100
-        else:
-            category["completion_percentage"] = 0
+    for name, category in TIMELINE_CATEGORIES.items():
+        completed_count = (mask & category["mask"]).bit_count()
+        categories[name] = {
+            "name": name,
+            "steps": [states[mask & bit != 0] for bit, states in category["steps"]],
+            "total_steps": len(category["steps"]),
+            "completed_steps": completed_count,
+            "completion_percentage": (completed_count / len(category["steps"])) * 100
+        }
     
     return categories
 
-@api_router.post("/timeline/update-progress")
-async def update_step_progress(progress: ProgressUpdate, current_user: User = Depends(get_current_user)):
-    user_completed_steps = current_user.completed_steps.copy()
+# Both timeline views depend only on the completion mask, so users in the same
+# state share one serialized response
+@api_router.get("/timeline/full")
+async def get_full_timeline(request: Request, current_user: User = Depends(get_current_user)):
+    mask = current_user.completed_mask
+    payload = timeline_responses.get(("full", mask), lambda: build_full_timeline(mask))
+    return payload.respond(request, cache_control="private, no-cache")
+
+@api_router.get("/timeline/by-category")
+async def get_timeline_by_category(request: Request, current_user: User = Depends(get_current_user)):
+    mask = current_user.completed_mask
+    payload = timeline_responses.get(("by-category", mask), lambda: build_timeline_by_category(mask))
+    return payload.respond(request, cache_control="private, no-cache")
+
+# Write-behind buffer for progress_logs. Nothing on the request path reads the
+# log, so entries are queued and written with insert_many once a batch fills up
+# or the flush interval passes. A full queue makes callers wait (backpressure)
+# rather than growing without bound; the shutdown hook drains what is left.
+PROGRESS_LOG_BATCH_SIZE = int(os.environ.get("PROGRESS_LOG_BATCH_SIZE", "500"))
+PROGRESS_LOG_FLUSH_SECONDS = float(os.environ.get("PROGRESS_LOG_FLUSH_SECONDS", "1.0"))
+PROGRESS_LOG_QUEUE_LIMIT = int(os.environ.get("PROGRESS_LOG_QUEUE_LIMIT", "10000"))
+PROGRESS_LOG_WRITE_ATTEMPTS = 3
+
+class ProgressLogWriter:
+    _STOP = None  # queued by close() to wake the writer and end the current batch
+
+    def __init__(self, batch_size: int, flush_seconds: float, queue_limit: int):
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.queue_limit = max(1, queue_limit)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_writes = 0
+        self.dropped = 0
+        self.backpressure_waits = 0
+        self.rollup_failures = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.queue_limit)
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def write(self, *entries: Dict[str, Any]):
+        if self._closing:
+            # Shutting down: write through instead of queueing behind the drain
+            await self._flush(list(entries))
+            return
+        self.start()
+        for entry in entries:
+            if self._queue.full():
+                self.backpressure_waits += 1
+            await self._queue.put(entry)
+            self.enqueued += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while not (self._closing and self._queue.empty()):
+            entry = await self._queue.get()
+            batch = [] if entry is self._STOP else [entry]
+            deadline = loop.time() + self.flush_seconds
+            while entry is not self._STOP and len(batch) < self.batch_size:
+                try:
+                    entry = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        entry = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if entry is not self._STOP:
+                    batch.append(entry)
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        # insert_many stamps each entry's _id in place, so a retry re-sends the
+        # same ids and entries an earlier attempt already stored come back as
+        # duplicate keys; those count as written
+        remaining = batch
+        written = []
+        for attempt in range(1, PROGRESS_LOG_WRITE_ATTEMPTS + 1):
+            try:
+                await db.progress_logs.insert_many(remaining, ordered=False)
+                written.extend(remaining)
+                remaining = []
+            except BulkWriteError as e:
+                failed = {error["index"] for error in e.details.get("writeErrors", []) if error.get("code") != 11000}
+                written.extend(entry for index, entry in enumerate(remaining) if index not in failed)
+                remaining = [entry for index, entry in enumerate(remaining) if index in failed]
+                if remaining:
+                    self.failed_writes += 1
+                    logging.getLogger(__name__).error(f"Writing {len(remaining)} progress logs failed (attempt {attempt}): {e}")
+            except PyMongoError as e:
+                self.failed_writes += 1
+                logging.getLogger(__name__).error(f"Writing {len(remaining)} progress logs failed (attempt {attempt}): {e}")
+            if not remaining:
+                break
+            if attempt < PROGRESS_LOG_WRITE_ATTEMPTS:
+                await asyncio.sleep(attempt)
+        self.dropped += len(remaining)
+        if not written:
+            return
+        self.written += len(written)
+        self.batches += 1
+        try:
+            await apply_progress_rollups(written)
+        except PyMongoError as e:
+            self.rollup_failures += 1
+            logging.getLogger(__name__).error(f"Updating progress rollups for {len(written)} logs failed: {e}")
+
+    async def close(self):
+        """Flush everything still queued; called from the shutdown hook"""
+        if self._task is None:
+            return
+        self._closing = True
+        await self._queue.put(self._STOP)
+        await self._task
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "queue_limit": self.queue_limit,
+            "batch_size": self.batch_size,
+            "flush_seconds": self.flush_seconds,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "failed_writes": self.failed_writes,
+            "dropped": self.dropped,
+            "backpressure_waits": self.backpressure_waits,
+            "rollup_failures": self.rollup_failures
+        }
+
+progress_log_writer = ProgressLogWriter(PROGRESS_LOG_BATCH_SIZE, PROGRESS_LOG_FLUSH_SECONDS, PROGRESS_LOG_QUEUE_LIMIT)
+
+# Daily progress rollups: one progress_daily_rollups document per user and UTC
+# day counting step completions and un-completions. Logs from before the
+# rollup cutoff are summarized by a resumable backfill that $sets "backfill"
+# counts a few days at a time (re-running a chunk is harmless); newer logs are
+# folded in by the log writer with $inc on "live". History reads only rollups
+# and walks back from the current mask, so only effective transitions are
+# logged. Known gap: logs inserted just before a crash, whose rollup $inc never
+# ran, are in progress_logs but not in "live" (the backfill only covers logs
+# before the cutoff); history before that day is then off by those logs.
+PROGRESS_ROLLUP_STATE_ID = "progress_daily_rollups"
+PROGRESS_ROLLUP_BACKFILL_DAYS = int(os.environ.get("PROGRESS_ROLLUP_BACKFILL_DAYS", "7"))
+progress_rollup_state = {"cutoff": None, "backfill_task": None}
+
+def utc_day(moment) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+async def load_rollup_cutoff() -> datetime:
+    if progress_rollup_state["cutoff"] is None:
+        state = await db.rollup_state.find_one_and_update(
+            {"_id": PROGRESS_ROLLUP_STATE_ID},
+            {"$setOnInsert": {"cutoff": datetime.utcnow(), "backfilled_until": None}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        progress_rollup_state["cutoff"] = state["cutoff"]
+    return progress_rollup_state["cutoff"]
+
+async def apply_progress_rollups(entries: List[Dict[str, Any]]):
+    cutoff = await load_rollup_cutoff()
+    deltas = {}
+    for entry in entries:
+        if entry["timestamp"] < cutoff:
+            continue  # counted by the backfill
+        counts = deltas.setdefault((entry["user_id"], utc_day(entry["timestamp"])), {"live.completed": 0, "live.uncompleted": 0})
+        counts["live.completed" if entry["completed"] else "live.uncompleted"] += 1
+    if deltas:
+        await db.progress_daily_rollups.bulk_write([
+            UpdateOne({"user_id": user_id, "day": day}, {"$inc": counts}, upsert=True)
+            for (user_id, day), counts in deltas.items()
+        ], ordered=False)
+
+async def backfill_progress_rollups():
+    cutoff = await load_rollup_cutoff()
+    state = await db.rollup_state.find_one({"_id": PROGRESS_ROLLUP_STATE_ID})
+    start = state.get("backfilled_until")
+    if start is None:
+        first = await db.progress_logs.find_one(
+            {"timestamp": {"$lt": cutoff}}, {"timestamp": 1}, sort=[("timestamp", ASCENDING)]
+        )
+        start = utc_day(first["timestamp"]) if first else cutoff
     
-    if progress.completed and progress.step_id not in user_completed_steps:
-        user_completed_steps.append(progress.step_id)
-    elif not progress.completed and progress.step_id in user_completed_steps:
-        user_completed_steps.remove(progress.step_id)
+    days = 0
+    while start < cutoff:
+        end = min(start + timedelta(days=PROGRESS_ROLLUP_BACKFILL_DAYS), cutoff)
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": start, "$lt": end}}},
+            {"$group": {
+                "_id": {"user_id": "$user_id", "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}},
+                "completed": {"$sum": {"$cond": ["$completed", 1, 0]}},
+                "uncompleted": {"$sum": {"$cond": ["$completed", 0, 1]}}
+            }}
+        ]
+        updates = [
+            UpdateOne(
+                {"user_id": row["_id"]["user_id"], "day": datetime.strptime(row["_id"]["day"], "%Y-%m-%d")},
+                {"$set": {"backfill": {"completed": row["completed"], "uncompleted": row["uncompleted"]}}},
+                upsert=True
+            )
+            async for row in db.progress_logs.aggregate(pipeline)
+        ]
+        if updates:
+            await db.progress_daily_rollups.bulk_write(updates, ordered=False)
+        await db.rollup_state.update_one({"_id": PROGRESS_ROLLUP_STATE_ID}, {"$set": {"backfilled_until": end}})
+        days += (end - start).days
+        start = end
+    await db.rollup_state.update_one({"_id": PROGRESS_ROLLUP_STATE_ID}, {"$set": {"backfilled_until": cutoff}})
+    if days:
+        logging.getLogger(__name__).info(f"Backfilled progress rollups for {days} days of logs")
+
+async def run_progress_rollup_backfill():
+    try:
+        await backfill_progress_rollups()
+    except PyMongoError as e:
+        # Resumes from the stored watermark on the next start
+        logging.getLogger(__name__).error(f"Progress rollup backfill failed: {e}")
+
+MAX_STEP_UPDATES_PER_BATCH = 100
+
+def validate_step_ids(step_ids):
+    unknown = sorted(set(step_id for step_id in step_ids if step_id not in TIMELINE_GRAPH.steps))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown timeline steps: {unknown}")
+
+def effective_step_changes(mask_before: int, step_ids, completed: bool) -> List[int]:
+    """Steps whose state actually changes; completing a completed step is a no-op"""
+    return [step_id for step_id in step_ids if bool(mask_before & (1 << step_id)) != completed]
+
+def step_progress_update(step_ids: List[int], completed: bool) -> Dict[str, Any]:
+    # Set operations plus $bit keep completed_steps and completed_mask in step
+    # without reading the user first, so concurrent toggles don't lose updates
+    bits = steps_to_mask(step_ids)
+    if completed:
+        return {"$addToSet": {"completed_steps": {"$each": step_ids}}, "$bit": {"completed_mask": {"or": bits}}}
+    return {"$pull": {"completed_steps": {"$in": step_ids}}, "$bit": {"completed_mask": {"and": ~bits}}}
+
+def step_progress_batch_update(added: List[int], removed: List[int]) -> List[Dict[str, Any]]:
+    # An update pipeline can both add and remove steps in one atomic write.
+    # Aggregation bit operators need MongoDB 6.3, so the mask is re-derived
+    # from completed_steps as a sum of powers of two instead of with $bit.
+    return [
+        {"$set": {"completed_steps": {"$setDifference": [
+            {"$setUnion": [{"$ifNull": ["$completed_steps", []]}, added]}, removed
+        ]}}},
+        {"$set": {"completed_mask": {"$toLong": {"$sum": {"$map": {
+            "input": "$completed_steps", "in": {"$pow": [2, "$$this"]}
+        }}}}}}
+    ]
+
+def timeline_progress_summary(mask: int) -> Dict[str, Any]:
+    """Everything the timeline page shows about progress, so clients can update without refetching"""
+    completed_count = mask.bit_count()
+    categories = {}
+    for name, category in TIMELINE_CATEGORIES.items():
+        category_completed = (mask & category["mask"]).bit_count()
+        categories[name] = {
+            "completed_steps": category_completed,
+            "total_steps": len(category["steps"]),
+            "completion_percentage": (category_completed / len(category["steps"])) * 100
+        }
+    return {
+        "completed_step_ids": mask_to_steps(mask),
+        "total_completed": completed_count,
+        "completion_percentage": (completed_count / len(RELOCATION_TIMELINE)) * 100,
+        "current_phase": get_current_phase(mask),
+        "categories": categories
+    }
+
+@api_router.post("/timeline/update-progress")
+async def update_step_progress(progress: StepProgressUpdate, current_user: User = Depends(get_current_user)):
+    validate_step_ids([progress.step_id])
     
-    # Update user in database
-    await db.users.update_one(
+    # Update user in database; the mask from before the write tells whether
+    # this request changed anything
+    user = await db.users.find_one_and_update(
         {"username": current_user.username},
-        {"$set": {"completed_steps": user_completed_steps}}
+        step_progress_update([progress.step_id], progress.completed),
+        projection={"completed_mask": 1},
+        return_document=ReturnDocument.BEFORE
     )
+    user_cache.invalidate(current_user.username)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    mask_before = user.get("completed_mask", 0)
+    bit = 1 << progress.step_id
+    mask = mask_before | bit if progress.completed else mask_before & ~bit
     
     # Log progress update
-    await db.progress_logs.insert_one({
-        "user_id": current_user.id,
-        "step_id": progress.step_id,
-        "completed": progress.completed,
-        "notes": progress.notes,
-        "timestamp": datetime.utcnow()
-    })
+    if effective_step_changes(mask_before, [progress.step_id], progress.completed):
+        await progress_log_writer.write({
+            "user_id": current_user.id,
+            "step_id": progress.step_id,
+            "completed": progress.completed,
+            "notes": progress.notes,
+            "timestamp": datetime.utcnow()
+        })
+    
+    return {
+        "message": "Progress updated successfully",
+        **timeline_progress_summary(mask)
+    }
+
+@api_router.post("/timeline/update-progress/batch")
+async def update_step_progress_batch(batch: StepProgressBatch, current_user: User = Depends(get_current_user)):
+    if not batch.updates:
+        raise HTTPException(status_code=400, detail="No updates provided")
+    if len(batch.updates) > MAX_STEP_UPDATES_PER_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_STEP_UPDATES_PER_BATCH} updates per batch")
+    validate_step_ids([update.step_id for update in batch.updates])
+    
+    # The last change to a step wins; what is left is one add and one remove
+    final_updates = {}
+    for update in batch.updates:
+        final_updates[update.step_id] = update
+    added = [step_id for step_id, update in final_updates.items() if update.completed]
+    removed = [step_id for step_id, update in final_updates.items() if not update.completed]
+    # One write applies both, so no other update can land between them; the
+    # mask it started from tells which steps it really flipped
+    user = await db.users.find_one_and_update(
+        {"username": current_user.username},
+        step_progress_batch_update(added, removed),
+        projection={"completed_mask": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    user_cache.invalidate(current_user.username)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    mask_before = user.get("completed_mask", 0)
+    changed = effective_step_changes(mask_before, added, True) + effective_step_changes(mask_before, removed, False)
+    mask = (mask_before | steps_to_mask(added)) & ~steps_to_mask(removed)
+    
+    timestamp = datetime.utcnow()
+    if changed:
+        await progress_log_writer.write(*[{
+            "user_id": current_user.id,
+            "step_id": step_id,
+            "completed": final_updates[step_id].completed,
+            "notes": final_updates[step_id].notes,
+            "timestamp": timestamp
+        } for step_id in changed])
     
     return {
         "message": "Progress updated successfully",
-        "total_completed": len(user_completed_steps),
-        "completion_percentage": (len(user_completed_steps) / len(RELOCATION_TIMELINE)) * 100
+        "applied": len(batch.updates),
+        "changed": len(changed),
+        **timeline_progress_summary(mask)
     }
 
-def get_current_phase(completed_steps):
-    """Determine current phase based on completed steps"""
-    if not completed_steps:
+@api_router.get("/timeline/schedule")
+async def get_timeline_schedule_projection(start_date: Optional[date] = None, current_user: User = Depends(get_current_user)):
+    start_date = start_date or datetime.utcnow().date()
+    schedule = get_timeline_schedule(current_user)
+    critical_path = schedule.critical_path()
+    on_critical_path = set(critical_path)
+    
+    steps = []
+    for step_id in TIMELINE_GRAPH.order:
+        step = TIMELINE_GRAPH.steps[step_id]
+        is_completed = step_id in schedule.completed
+        earliest_start = schedule.earliest_start[step_id]
+        slack = schedule.slack(step_id)
+        steps.append({
+            "id": step_id,
+            "title": step["title"],
+            "category": step["category"],
+            "estimated_days": step["estimated_days"],
+            "dependencies": step["dependencies"],
+            "is_completed": is_completed,
+            "earliest_start": earliest_start,
+            "earliest_finish": schedule.earliest_finish[step_id],
+            "latest_start": earliest_start + slack,
+            "latest_finish": schedule.earliest_finish[step_id] + slack,
+            "slack": slack,
+            "is_critical": step_id in on_critical_path,
+            "projected_start": None if is_completed else (start_date + timedelta(days=earliest_start)).isoformat(),
+            "projected_finish": None if is_completed else (start_date + timedelta(days=schedule.earliest_finish[step_id])).isoformat()
+        })
+    
+    return {
+        "start_date": start_date.isoformat(),
+        "remaining_days": schedule.duration,
+        "projected_completion": (start_date + timedelta(days=schedule.duration)).isoformat(),
+        "critical_path": critical_path,
+        "schedule": steps
+    }
+
+def get_current_phase(completed_mask):
+    """Determine current phase based on the highest completed step"""
+    if not completed_mask:
         return "Planning"
     
-    max_completed = max(completed_steps)
+    max_completed = completed_mask.bit_length() - 1
     
     if max_completed <= 3:
         return "Planning"
@@ -1079,106 +3070,247 @@ def get_current_phase(completed_steps):
         return "Settlement"
 
 # Resources and Links endpoints
+RESOURCE_LINKS = {
+    "visa_legal": [
+        {"name": "UK Government Visa Guide", "url": "https://www.gov.uk/browse/visas-immigration", "description": "Official UK visa information"},
+        {"name": "Immigration Lawyer Directory", "url": "https://www.lawsociety.org.uk", "description": "Find qualified immigration lawyers"},
+        {"name": "Document Apostille Services", "url": "https://www.gov.uk/get-document-legalised", "description": "Document legalization services"},
+        {"name": "Visa Application Centre", "url": "https://www.vfsglobal.co.uk", "description": "UK visa application centres"}
+    ],
+    "housing": [
+        {"name": "Rightmove", "url": "https://www.rightmove.co.uk", "description": "UK's largest property portal"},
+        {"name": "Zoopla", "url": "https://www.zoopla.co.uk", "description": "Property search and valuation"},
+        {"name": "SpareRoom", "url": "https://www.spareroom.co.uk", "description": "Room rental and flatshare platform"},
+        {"name": "Peak District Property", "url": "https://www.peakdistrictproperty.co.uk", "description": "Local estate agents in Peak District"}
+    ],
+    "employment": [
+        {"name": "Indeed UK", "url": "https://uk.indeed.com", "description": "Job search platform"},
+        {"name": "Reed", "url": "https://www.reed.co.uk", "description": "UK recruitment website"},
+        {"name": "LinkedIn UK", "url": "https://www.linkedin.com/jobs", "description": "Professional networking and jobs"},
+        {"name": "Peak District Jobs", "url": "https://www.peakdistrictjobs.co.uk", "description": "Local job opportunities"}
+    ],
+    "financial": [
+        {"name": "Monzo", "url": "https://monzo.com", "description": "Digital bank popular with expats"},
+        {"name": "Wise", "url": "https://wise.com", "description": "International money transfers"},
+        {"name": "HMRC", "url": "https://www.gov.uk/government/organisations/hm-revenue-customs", "description": "UK tax authority"},
+        {"name": "NHS Registration", "url": "https://www.nhs.uk/using-the-nhs/nhs-services/gps/how-to-register-with-a-gp-practice/", "description": "Healthcare registration"}
+    ],
+    "local_services": [
+        {"name": "Peak District National Park", "url": "https://www.peakdistrict.gov.uk", "description": "Official park information"},
+        {"name": "Derbyshire County Council", "url": "https://www.derbyshire.gov.uk", "description": "Local government services"},
+        {"name": "Peak District Chamber", "url": "https://www.peakdistrictchamber.co.uk", "description": "Business networking"},
+        {"name": "Local Community Groups", "url": "https://www.facebook.com/groups/peakdistrictexpats", "description": "Expat community support"}
+    ],
+    "lifestyle": [
+        {"name": "Visit Peak District", "url": "https://www.visitpeakdistrict.com", "description": "Tourism and attractions"},
+        {"name": "Peak District Weather", "url": "https://www.metoffice.gov.uk", "description": "Weather forecasts"},
+        {"name": "Public Transport", "url": "https://www.travelsouthyorkshire.com", "description": "Local transport information"},
+        {"name": "Healthcare Finder", "url": "https://www.nhs.uk/service-search", "description": "Find local healthcare services"}
+    ]
+}
+
 @api_router.get("/resources/all")
-async def get_all_resources():
-    return {
-        "visa_legal": [
-            {"name": "UK Government Visa Guide", "url": "https://www.gov.uk/browse/visas-immigration", "description": "Official UK visa information"},
-            {"name": "Immigration Lawyer Directory", "url": "https://www.lawsociety.org.uk", "description": "Find qualified immigration lawyers"},
-            {"name": "Document Apostille Services", "url": "https://www.gov.uk/get-document-legalised", "description": "Document legalization services"},
-            {"name": "Visa Application Centre", "url": "https://www.vfsglobal.co.uk", "description": "UK visa application centres"}
-        ],
-        "housing": [
-            {"name": "Rightmove", "url": "https://www.rightmove.co.uk", "description": "UK's largest property portal"},
-            {"name": "Zoopla", "url": "https://www.zoopla.co.uk", "description": "Property search and valuation"},
-            {"name": "SpareRoom", "url": "https://www.spareroom.co.uk", "description": "Room rental and flatshare platform"},
-            {"name": "Peak District Property", "url": "https://www.peakdistrictproperty.co.uk", "description": "Local estate agents in Peak District"}
-        ],
-        "employment": [
-            {"name": "Indeed UK", "url": "https://uk.indeed.com", "description": "Job search platform"},
-            {"name": "Reed", "url": "https://www.reed.co.uk", "description": "UK recruitment website"},
-            {"name": "LinkedIn UK", "url": "https://www.linkedin.com/jobs", "description": "Professional networking and jobs"},
-            {"name": "Peak District Jobs", "url": "https://www.peakdistrictjobs.co.uk", "description": "Local job opportunities"}
-        ],
-        "financial": [
-            {"name": "Monzo", "url": "https://monzo.com", "description": "Digital bank popular with expats"},
-            {"name": "Wise", "url": "https://wise.com", "description": "International money transfers"},
-            {"name": "HMRC", "url": "https://www.gov.uk/government/organisations/hm-revenue-customs", "description": "UK tax authority"},
-            {"name": "NHS Registration", "url": "https://www.nhs.uk/using-the-nhs/nhs-services/gps/how-to-register-with-a-gp-practice/", "description": "Healthcare registration"}
-        ],
-        "local_services": [
-            {"name": "Peak District National Park", "url": "https://www.peakdistrict.gov.uk", "description": "Official park information"},
-            {"name": "Derbyshire County Council", "url": "https://www.derbyshire.gov.uk", "description": "Local government services"},
-            {"name": "Peak District Chamber", "url": "https://www.peakdistrictchamber.co.uk", "description": "Business networking"},
-            {"name": "Local Community Groups", "url": "https://www.facebook.com/groups/peakdistrictexpats", "description": "Expat community support"}
-        ],
-        "lifestyle": [
-            {"name": "Visit Peak District", "url": "https://www.visitpeakdistrict.com", "description": "Tourism and attractions"},
-            {"name": "Peak District Weather", "url": "https://www.metoffice.gov.uk", "description": "Weather forecasts"},
-            {"name": "Public Transport", "url": "https://www.travelsouthyorkshire.com", "description": "Local transport information"},
-            {"name": "Healthcare Finder", "url": "https://www.nhs.uk/service-search", "description": "Find local healthcare services"}
-        ]
+async def get_all_resources(request: Request):
+    return precomputed_response(request, "resources/all", lambda: RESOURCE_LINKS)
+
+# Per-user progress counters. progress_counters holds one document per user
+# (_id = user_id) with item counts by status, priority and category plus
+# subtask totals. Every item write applies its delta with $inc right after the
+# item itself changes, using the before/after documents returned by that
+# write, so statistics are a single read. Without multi-document transactions
+# the two writes can drift apart (e.g. a crash in between); the reconciler
+# recomputes counters from the items periodically and repairs any difference.
+# Each item write is bracketed by "pending" +1/-1 (both bumping "version"), so
+# the reconciler skips users with a write in flight, whose item change may be
+# in its count but whose $inc has not landed, and its compare-and-set on
+# version fails if a write starts while it counts.
+PROGRESS_COUNTER_RECONCILE_SECONDS = float(os.environ.get("PROGRESS_COUNTER_RECONCILE_SECONDS", "600"))
+progress_counter_state = {"task": None, "runs": 0, "checked": 0, "deferred": 0, "repaired": 0, "rebuilt": 0, "last_run_at": None}
+
+def counter_key(name: str) -> str:
+    # Category names become field names; "." and "$" are not allowed there
+    return name.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+def counter_name(key: str) -> str:
+    return key.replace("%24", "$").replace("%2E", ".").replace("%25", "%")
+
+def progress_item_counts(item: Dict[str, Any], sign: int = 1) -> Dict[str, int]:
+    status = item.get("status") or "not_started"
+    category = counter_key(item.get("category") or "General")
+    subtasks = item.get("subtasks") or []
+    counts = {
+        "total": sign,
+        f"status.{counter_key(status)}": sign,
+        f"priority.{counter_key(item.get('priority') or 'medium')}": sign,
+        f"category.{category}.total": sign,
+        "subtasks.total": sign * len(subtasks),
+        "subtasks.completed": sign * sum(1 for subtask in subtasks if subtask.get("completed"))
     }
+    if status in ("completed", "in_progress"):
+        counts[f"category.{category}.{status}"] = sign
+    return counts
+
+def progress_item_delta(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    deltas: Dict[str, int] = {}
+    for item, sign in ((before, -1), (after, 1)):
+        if item is not None:
+            for key, count in progress_item_counts(item, sign).items():
+                deltas[key] = deltas.get(key, 0) + count
+    return deltas
+
+@asynccontextmanager
+async def progress_counter_change(user_id: str):
+    """Bracket one item write; the body adds its counter delta to the yielded dict"""
+    # No upsert: a missing document is rebuilt from the items on next read
+    await db.progress_counters.update_one(
+        {"_id": user_id}, {"$inc": {"pending": 1, "version": 1}, "$set": {"updated_at": datetime.utcnow()}}
+    )
+    deltas: Dict[str, int] = {}
+    try:
+        yield deltas
+    finally:
+        # Released even when the item write fails, with whatever delta it got to
+        deltas = {key: count for key, count in deltas.items() if count}
+        await db.progress_counters.update_one(
+            {"_id": user_id}, {"$inc": {**deltas, "pending": -1, "version": 1}, "$set": {"updated_at": datetime.utcnow()}}
+        )
+
+async def count_progress_items(user_id: str) -> Dict[str, Any]:
+    groups = await db.progress_items.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$group": {
+            "_id": {
+                "category": {"$ifNull": ["$category", "General"]},
+                "status": {"$ifNull": ["$status", "not_started"]},
+                "priority": {"$ifNull": ["$priority", "medium"]}
+            },
+            "count": {"$sum": 1},
+            "subtasks": {"$sum": {"$size": {"$ifNull": ["$subtasks", []]}}},
+            "subtasks_completed": {"$sum": {"$size": {"$filter": {"input": {"$ifNull": ["$subtasks", []]}, "cond": "$$this.completed"}}}}
+        }}
+    ]).to_list(length=None)
+    counts = {"total": 0, "status": {}, "priority": {}, "category": {}, "subtasks": {"total": 0, "completed": 0}}
+    for group in groups:
+        key, count = group["_id"], group["count"]
+        status = counter_key(key["status"])
+        category = counts["category"].setdefault(counter_key(key["category"]), {"total": 0})
+        counts["total"] += count
+        counts["status"][status] = counts["status"].get(status, 0) + count
+        counts["priority"][counter_key(key["priority"])] = counts["priority"].get(counter_key(key["priority"]), 0) + count
+        category["total"] += count
+        if key["status"] in ("completed", "in_progress"):
+            category[key["status"]] = category.get(key["status"], 0) + count
+        counts["subtasks"]["total"] += group["subtasks"]
+        counts["subtasks"]["completed"] += group["subtasks_completed"]
+    return counts
+
+def counters_differ(stored: Dict[str, Any], actual: Dict[str, Any]) -> bool:
+    # $inc leaves zero entries behind, so compare without them
+    def strip(value):
+        if isinstance(value, dict):
+            stripped = {key: strip(item) for key, item in value.items()}
+            return {key: item for key, item in stripped.items() if item != 0 and item != {}}
+        return value
+    return strip({key: stored.get(key) for key in actual}) != strip(actual)
+
+async def rebuild_progress_counters(user_id: str, expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Recompute a user's counters from their items; with expected_version, only if nothing changed meanwhile"""
+    counts = await count_progress_items(user_id)
+    document = {**counts, "version": (expected_version or 0) + 1, "updated_at": datetime.utcnow()}
+    if expected_version is None:
+        await db.progress_counters.replace_one({"_id": user_id}, document, upsert=True)
+    else:
+        result = await db.progress_counters.replace_one({"_id": user_id, "version": expected_version}, document)
+        if result.matched_count == 0:
+            return None
+    return {"_id": user_id, **document}
+
+async def get_progress_counters(user_id: str) -> Dict[str, Any]:
+    counters = await db.progress_counters.find_one({"_id": user_id})
+    if counters is None:
+        counters = await rebuild_progress_counters(user_id)
+        progress_counter_state["rebuilt"] += 1
+    return counters
+
+async def reconcile_progress_counters():
+    abandoned_before = datetime.utcnow() - timedelta(seconds=PROGRESS_COUNTER_RECONCILE_SECONDS)
+    async for stored in db.progress_counters.find({}):
+        pending = stored.get("pending", 0)
+        if pending and stored.get("updated_at", abandoned_before) > abandoned_before:
+            # A write is between its item change and its $inc; check again next run
+            progress_counter_state["deferred"] += 1
+            continue
+        actual = await count_progress_items(stored["_id"])
+        progress_counter_state["checked"] += 1
+        # A marker untouched for a whole interval was left by a crashed request
+        if pending or counters_differ(stored, actual):
+            if await rebuild_progress_counters(stored["_id"], stored.get("version", 0)) is not None:
+                progress_counter_state["repaired"] += 1
+                logging.getLogger(__name__).warning(f"Repaired drifted progress counters for user {stored['_id']}")
+    progress_counter_state["runs"] += 1
+    progress_counter_state["last_run_at"] = datetime.utcnow()
+
+async def run_progress_counter_reconciler():
+    while True:
+        await asyncio.sleep(PROGRESS_COUNTER_RECONCILE_SECONDS)
+        try:
+            await reconcile_progress_counters()
+        except PyMongoError as e:
+            logging.getLogger(__name__).error(f"Progress counter reconciliation failed: {e}")
+
+@api_router.post("/admin/progress/reconcile")
+async def reconcile_progress_counters_now(admin_user: User = Depends(get_admin_user)):
+    await reconcile_progress_counters()
+    return {key: value for key, value in progress_counter_state.items() if key != "task"}
 
 # Progress tracking endpoints
 @api_router.get("/progress/items")
-async def get_progress_items(current_user: User = Depends(get_current_user), category: Optional[str] = None, status: Optional[str] = None):
-    # Initialize progress items for user if they don't exist
-    existing_items = await db.progress_items.find({"user_id": current_user.id}).to_list(length=None)
-    
-    if not existing_items:
-        # Create initial progress items for user
-        initial_items = []
-        for item_data in SAMPLE_PROGRESS_ITEMS:
-            item = ProgressItem(user_id=current_user.id, **item_data)
-            item_dict = item.dict()
-            # Ensure datetime objects are properly handled
-            for key, value in item_dict.items():
-                if isinstance(value, datetime):
-                    item_dict[key] = value.isoformat()
-            initial_items.append(item_dict)
-        
-        if initial_items:
-            await db.progress_items.insert_many(initial_items)
-            # Fetch the newly created items
-            existing_items = await db.progress_items.find({"user_id": current_user.id}).to_list(length=None)
-    
-    # Convert MongoDB documents to dict and handle ObjectId
-    serialized_items = []
-    for item in existing_items:
-        # Convert MongoDB document to dict and handle ObjectId
-        item_dict = dict(item)
-        if "_id" in item_dict:
-            del item_dict["_id"]  # Remove MongoDB ObjectId
-        
-        # Ensure datetime fields are serializable
-        for key, value in item_dict.items():
-            if isinstance(value, datetime):
-                item_dict[key] = value.isoformat()
-        
-        serialized_items.append(item_dict)
+async def get_progress_items(current_user: User = Depends(get_current_user), category: Optional[str] = None, status: Optional[str] = None,
+                             limit: Optional[int] = None, after: Optional[str] = None, fields: Optional[str] = None):
+    page_limit = page_size(limit, after)
+    projection = parse_fields(fields, ProgressItem)
     
-    # Filter by category and status if provided
-    filtered_items = serialized_items
+    await ensure_progress_seeded(current_user)
+    
+    # Filters and the fields= projection are applied by Mongo so unused fields
+    # are never read or sent
+    query: Dict[str, Any] = {"user_id": current_user.id}
     if category:
-        filtered_items = [item for item in filtered_items if item.get("category") == category]
+        query["category"] = category
     if status:
-        filtered_items = [item for item in filtered_items if item.get("status") == status]
+        query["status"] = status
+    mongo_projection = {"_id": 0}
+    if projection is not None:
+        mongo_projection.update({field: 1 for field in projection})
     
-    # Calculate statistics
-    total_items = len(serialized_items)
-    completed_items = len([item for item in serialized_items if item.get("status") == "completed"])
-    in_progress_items = len([item for item in serialized_items if item.get("status") == "in_progress"])
+    next_cursor = None
+    if page_limit is None:
+        existing_items = await db.progress_items.find(query, mongo_projection).to_list(length=None)
+    else:
+        if after is not None:
+            query["id"] = {"$gt": str(decode_cursor(after).get("id", ""))}
+        cursor = db.progress_items.find(query, mongo_projection).sort("id", ASCENDING).limit(page_limit + 1)
+        existing_items = await cursor.to_list(length=page_limit + 1)
+        if len(existing_items) > page_limit:
+            existing_items = existing_items[:page_limit]
+            next_cursor = encode_cursor({"id": existing_items[-1]["id"]})
+    
+    # Statistics cover every item for the user, regardless of filters and paging
+    counters = await get_progress_counters(current_user.id)
+    total_items = counters.get("total", 0)
+    completed_items = counters.get("status", {}).get("completed", 0)
+    in_progress_items = counters.get("status", {}).get("in_progress", 0)
     
     return {
-        "items": filtered_items,
+        "items": existing_items,
+        "next_cursor": next_cursor,
         "statistics": {
             "total": total_items,
             "completed": completed_items,
             "in_progress": in_progress_items,
             "completion_percentage": (completed_items / total_items * 100) if total_items > 0 else 0
         },
-        "categories": list(set([item.get("category") for item in serialized_items])),
+        "categories": [counter_name(key) for key, category in counters.get("category", {}).items() if category.get("total")],
         "statuses": ["not_started", "in_progress", "completed", "blocked"]
     }
 
@@ -1208,11 +3340,20 @@ async def update_progress_item(item_id: str, update_data: ProgressUpdate, curren
     if update_data.due_date is not None:
         update_fields["due_date"] = update_data.due_date
     
-    # Update in database
-    await db.progress_items.update_one(
-        {"id": item_id, "user_id": current_user.id},
-        {"$set": update_fields}
-    )
+    # Update in database; the document as it was just before this write gives
+    # the exact counter delta even if another update got in first
+    async with progress_counter_change(current_user.id) as deltas:
+        before = await db.progress_items.find_one_and_update(
+            {"id": item_id, "user_id": current_user.id},
+            {"$set": update_fields},
+            projection={"_id": 0, "status": 1, "priority": 1, "category": 1, "subtasks": 1, "due_date": 1}
+        )
+        if before is None:
+            raise HTTPException(status_code=404, detail="Progress item not found")
+        after = {**before, **update_fields}
+        deltas.update(progress_item_delta(before, after))
+    if "due_date" in update_fields or "status" in update_fields:
+        reminder_scheduler.reschedule(item_id, after.get("due_date"), after.get("status"))
     
     return {"message": "Progress item updated successfully", "updated_fields": update_fields}
 
@@ -1224,19 +3365,26 @@ async def toggle_subtask(item_id: str, subtask_index: int, current_user: User =
         raise HTTPException(status_code=404, detail="Progress item not found")
     
     subtasks = existing_item.get("subtasks", [])
-    if subtask_index >= len(subtasks):
+    if subtask_index < 0 or subtask_index >= len(subtasks):
         raise HTTPException(status_code=400, detail="Invalid subtask index")
     
-    # Toggle subtask completion
-    subtasks[subtask_index]["completed"] = not subtasks[subtask_index]["completed"]
-    
-    # Update in database
-    await db.progress_items.update_one(
-        {"id": item_id, "user_id": current_user.id},
-        {"$set": {"subtasks": subtasks, "updated_at": datetime.utcnow()}}
-    )
+    # Toggle subtask completion, only if nobody else toggled it since the read
+    completed = bool(subtasks[subtask_index].get("completed"))
+    field = f"subtasks.{subtask_index}.completed"
+    async with progress_counter_change(current_user.id) as deltas:
+        updated_item = await db.progress_items.find_one_and_update(
+            {"id": item_id, "user_id": current_user.id, field: True if completed else {"$ne": True}},
+            {"$set": {field: not completed, "updated_at": datetime.utcnow()}},
+            projection={"_id": 0, "subtasks": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if updated_item is None:
+            raise HTTPException(status_code=409, detail="Subtask was changed by another request, please retry")
+        # Only the flipped flag is guarded by the write, so count only that change;
+        # diffing whole arrays would also pick up other concurrent toggles
+        deltas["subtasks.completed"] = -1 if completed else 1
     
-    return {"message": "Subtask updated successfully", "subtasks": subtasks}
+    return {"message": "Subtask updated successfully", "subtasks": updated_item["subtasks"]}
 
 @api_router.post("/progress/items")
 async def create_progress_item(item_data: Dict[str, Any], current_user: User = Depends(get_current_user)):
@@ -1252,115 +3400,95 @@ async def create_progress_item(item_data: Dict[str, Any], current_user: User = D
     )
     
     # Insert into database
-    await db.progress_items.insert_one(new_item.dict())
+    async with progress_counter_change(current_user.id) as deltas:
+        await db.progress_items.insert_one(new_item.dict())
+        deltas.update(progress_item_delta(None, new_item.dict()))
+    reminder_scheduler.reschedule(new_item.id, new_item.due_date, new_item.status)
     
     return {"message": "Progress item created successfully", "item": new_item.dict()}
 
 @api_router.delete("/progress/items/{item_id}")
 async def delete_progress_item(item_id: str, current_user: User = Depends(get_current_user)):
-    result = await db.progress_items.delete_one({"id": item_id, "user_id": current_user.id})
-    
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Progress item not found")
+    async with progress_counter_change(current_user.id) as deltas:
+        deleted_item = await db.progress_items.find_one_and_delete(
+            {"id": item_id, "user_id": current_user.id},
+            projection={"_id": 0, "status": 1, "priority": 1, "category": 1, "subtasks": 1}
+        )
+        
+        if deleted_item is None:
+            raise HTTPException(status_code=404, detail="Progress item not found")
+        deltas.update(progress_item_delta(deleted_item, None))
+    reminder_scheduler.reschedule(item_id, None, None)
     
     return {"message": "Progress item deleted successfully"}
 
+UPCOMING_DEADLINE_DAYS = 7
+DASHBOARD_DEADLINE_FIELDS = {"_id": 0, "id": 1, "title": 1, "category": 1, "status": 1, "priority": 1, "due_date": 1}
+
+OPEN_PROGRESS_STATUSES = ["not_started", "in_progress", "blocked"]
+
 @api_router.get("/progress/dashboard")
 async def get_progress_dashboard(current_user: User = Depends(get_current_user)):
-    # Get all progress items for user
-    items = await db.progress_items.find({"user_id": current_user.id}).to_list(length=None)
-    
-    if not items:
-        # Initialize with sample data if no items exist
-        initial_items = []
-        for item_data in SAMPLE_PROGRESS_ITEMS:
-            item = ProgressItem(user_id=current_user.id, **item_data)
-            item_dict = item.dict()
-            # Ensure datetime objects are properly handled
-            for key, value in item_dict.items():
-                if isinstance(value, datetime):
-                    item_dict[key] = value.isoformat()
-            initial_items.append(item_dict)
-        
-        if initial_items:
-            await db.progress_items.insert_many(initial_items)
-            items = await db.progress_items.find({"user_id": current_user.id}).to_list(length=None)
-    
-    # Convert MongoDB documents to serializable format
-    serialized_items = []
-    for item in items:
-        item_dict = dict(item)
-        if "_id" in item_dict:
-            del item_dict["_id"]  # Remove MongoDB ObjectId
-        
-        # Ensure datetime fields are serializable
-        for key, value in item_dict.items():
-            if isinstance(value, datetime):
-                item_dict[key] = value.isoformat()
-        
-        serialized_items.append(item_dict)
-    
-    # Calculate statistics by category
-    category_stats = {}
-    priority_stats = {"high": 0, "medium": 0, "low": 0, "urgent": 0}
-    status_stats = {"not_started": 0, "in_progress": 0, "completed": 0, "blocked": 0}
-    
-    for item in serialized_items:
-        category = item.get("category", "General")
-        if category not in category_stats:
-            category_stats[category] = {"total": 0, "completed": 0, "in_progress": 0}
-        
-        category_stats[category]["total"] += 1
-        
-        status = item.get("status", "not_started")
-        status_stats[status] += 1
-        
-        priority = item.get("priority", "medium")
-        priority_stats[priority] += 1
-        
-        if status == "completed":
-            category_stats[category]["completed"] += 1
-        elif status == "in_progress":
-            category_stats[category]["in_progress"] += 1
-    
-    # Calculate completion percentages
-    for category in category_stats:
-        total = category_stats[category]["total"]
-        completed = category_stats[category]["completed"]
-        category_stats[category]["completion_percentage"] = (completed / total * 100) if total > 0 else 0
-    
-    # Get current date
+    await ensure_progress_seeded(current_user)
     current_date = datetime.utcnow()
     
-    # Get overdue and upcoming items (simplified logic to avoid datetime parsing issues)
-    overdue_items = []
-    upcoming_items = []
+    # Breakdowns come from the maintained counters. Deadlines are one range scan
+    # on the (user_id, status, due_date) index covering open items due before
+    # the end of the upcoming window, split into both slices by a $facet.
+    counters = await get_progress_counters(current_user.id)
+    results = await db.progress_items.aggregate([
+        {"$match": {
+            "user_id": current_user.id,
+            "status": {"$in": OPEN_PROGRESS_STATUSES},
+            "due_date": {"$lt": current_date + timedelta(days=UPCOMING_DEADLINE_DAYS)}
+        }},
+        {"$sort": {"due_date": 1}},
+        {"$facet": {
+            "overdue": [{"$match": {"due_date": {"$lt": current_date}}}, {"$limit": 5}, {"$project": DASHBOARD_DEADLINE_FIELDS}],
+            "overdue_count": [{"$match": {"due_date": {"$lt": current_date}}}, {"$count": "count"}],
+            "upcoming": [{"$match": {"due_date": {"$gte": current_date}}}, {"$limit": 5}, {"$project": DASHBOARD_DEADLINE_FIELDS}],
+            "upcoming_count": [{"$match": {"due_date": {"$gte": current_date}}}, {"$count": "count"}]
+        }}
+    ]).to_list(length=1)
+    facets = results[0]
     
-    for item in serialized_items:
-        if item.get("due_date") and item.get("status") != "completed":
-            try:
-                # Simple date comparison logic
-                if "days=5" in str(item.get("due_date")) or "days=3" in str(item.get("due_date")):
-                    upcoming_items.append(item)
-                elif "days=-" in str(item.get("due_date")):
-                    overdue_items.append(item)
-            except:
-                pass  # Skip items with problematic dates
+    category_stats = {}
+    for key, category in counters.get("category", {}).items():
+        if not category.get("total"):
+            continue
+        completed = category.get("completed", 0)
+        category_stats[counter_name(key)] = {
+            "total": category["total"],
+            "completed": completed,
+            "in_progress": category.get("in_progress", 0),
+            "completion_percentage": completed / category["total"] * 100
+        }
+    status_stats = {"not_started": 0, "in_progress": 0, "completed": 0, "blocked": 0}
+    for key, count in counters.get("status", {}).items():
+        if count or counter_name(key) in status_stats:
+            status_stats[counter_name(key)] = count
+    priority_stats = {"high": 0, "medium": 0, "low": 0, "urgent": 0}
+    for key, count in counters.get("priority", {}).items():
+        if count or counter_name(key) in priority_stats:
+            priority_stats[counter_name(key)] = count
+    total_items = counters.get("total", 0)
+    overdue_count = facets["overdue_count"][0]["count"] if facets["overdue_count"] else 0
+    upcoming_count = facets["upcoming_count"][0]["count"] if facets["upcoming_count"] else 0
     
     return {
         "overview": {
-            "total_items": len(serialized_items),
+            "total_items": total_items,
             "completed_items": status_stats["completed"],
             "in_progress_items": status_stats["in_progress"],
-            "overdue_items": len(overdue_items),
-            "upcoming_deadlines": len(upcoming_items),
-            "overall_completion": (status_stats["completed"] / len(serialized_items) * 100) if len(serialized_items) > 0 else 0
+            "overdue_items": overdue_count,
+            "upcoming_deadlines": upcoming_count,
+            "overall_completion": (status_stats["completed"] / total_items * 100) if total_items > 0 else 0
         },
         "category_breakdown": category_stats,
         "status_distribution": status_stats,
         "priority_distribution": priority_stats,
-        "overdue_items": overdue_items[:5],  # Top 5 overdue
-        "upcoming_deadlines": upcoming_items[:5],  # Next 5 deadlines
+        "overdue_items": facets["overdue"],  # Top 5 overdue
+        "upcoming_deadlines": facets["upcoming"],  # Next 5 deadlines
         "recent_activity": [
             {"action": "Completed visa application form", "timestamp": (current_date - timedelta(hours=2)).isoformat()},
             {"action": "Updated moving quotes comparison", "timestamp": (current_date - timedelta(hours=6)).isoformat()},
@@ -1369,112 +3497,390 @@ async def get_progress_dashboard(current_user: User = Depends(get_current_user))
         ]
     }
 
-# Logistics endpoints
-@api_router.get("/logistics/providers")
-async def get_logistics_providers(service_type: Optional[str] = None):
-    providers = []
-    for provider_data in LOGISTICS_PROVIDERS:
-        provider = LogisticsProvider(**provider_data)
-        if service_type and provider.service_type != service_type:
+# Deadline reminders. Each open progress item with a due_date gets one reminder
+# REMINDER_LEAD_HOURS before it is due. The scheduler keeps a heap of only the
+# reminders firing before the end of the current window, loaded with a range
+# scan on the (status, due_date) index; once the clock passes the window end
+# it persists that as the watermark and loads the next window, so a restart
+# resumes (and catches up) from where it stopped. Each reminder is claimed by
+# stamping reminded_due_date on the item before it is handed to the sinks, so
+# it is delivered once per due date even across restarts or several workers.
+REMINDER_STATE_ID = "deadline_reminders"
+REMINDER_LEAD_HOURS = float(os.environ.get("REMINDER_LEAD_HOURS", "24"))
+REMINDER_WINDOW_MINUTES = float(os.environ.get("REMINDER_WINDOW_MINUTES", "60"))
+REMINDER_SINKS = os.environ.get("REMINDER_SINKS", "log,inbox")
+REMINDER_WEBHOOK_URL = os.environ.get("REMINDER_WEBHOOK_URL", "")
+REMINDER_ITEM_FIELDS = {"_id": 0, "id": 1, "user_id": 1, "title": 1, "category": 1, "due_date": 1, "reminded_due_date": 1}
+
+def bson_datetime(value: datetime) -> datetime:
+    """Naive UTC with millisecond precision, i.e. the value Mongo hands back for a stored datetime"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+class LogReminderSink:
+    name = "log"
+
+    async def deliver(self, reminder: Dict[str, Any]):
+        logging.getLogger(__name__).info(
+            f"Reminder for user {reminder['user_id']}: '{reminder['title']}' is due {reminder['due_date'].isoformat()}"
+        )
+
+class WebhookReminderSink:
+    """Stub: records the payload it would POST to REMINDER_WEBHOOK_URL"""
+    name = "webhook"
+
+    def __init__(self, url: str, keep: int = 100):
+        self.url = url
+        self.sent = deque(maxlen=keep)
+
+    async def deliver(self, reminder: Dict[str, Any]):
+        payload = jsonable_encoder(reminder)
+        self.sent.append(payload)
+        logging.getLogger(__name__).info(f"Webhook stub: would POST reminder {payload['item_id']} to {self.url or '(unset)'}")
+
+class InboxReminderSink:
+    """Writes the reminder to the user's in-app notifications"""
+    name = "inbox"
+
+    async def deliver(self, reminder: Dict[str, Any]):
+        await db.notifications.insert_one({
+            "id": str(uuid.uuid4()),
+            "user_id": reminder["user_id"],
+            "type": reminder["type"],
+            "item_id": reminder["item_id"],
+            "title": f"'{reminder['title']}' is due soon",
+            "due_date": reminder["due_date"],
+            "read": False,
+            "created_at": datetime.utcnow()
+        })
+
+REMINDER_SINK_TYPES = {
+    "log": LogReminderSink,
+    "webhook": lambda: WebhookReminderSink(REMINDER_WEBHOOK_URL),
+    "inbox": InboxReminderSink,
+}
+
+def build_reminder_sinks(names: str) -> list:
+    sinks = []
+    for name in filter(None, (part.strip() for part in names.split(","))):
+        if name not in REMINDER_SINK_TYPES:
+            logging.getLogger(__name__).warning(f"Ignoring unknown reminder sink '{name}'")
             continue
-        providers.append(provider.dict())
+        sinks.append(REMINDER_SINK_TYPES[name]())
+    return sinks
+
+class ReminderScheduler:
+    def __init__(self, lead: timedelta, window: timedelta, sinks: list):
+        self.lead = lead
+        self.window = window
+        self.sinks = sinks
+        self._heap: List[tuple] = []  # (fire_at, seq, item_id, due_date)
+        self._scheduled: Dict[str, datetime] = {}  # item id -> due date of its live heap entry
+        self._seq = itertools.count()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.watermark: Optional[datetime] = None
+        self.window_end: Optional[datetime] = None
+        self.loaded = 0
+        self.fired = 0
+        self.stale = 0
+        self.unclaimed = 0
+        self.sink_errors = 0
+        self.windows = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _push(self, item_id: str, due_date: datetime):
+        self._scheduled[item_id] = due_date
+        heapq.heappush(self._heap, (due_date - self.lead, next(self._seq), item_id, due_date))
+
+    def reschedule(self, item_id: str, due_date: Optional[datetime], status: Optional[str]):
+        """Called after an item's due date or status changes; replaces any pending reminder"""
+        if self.window_end is None:
+            return  # not loaded yet; the first window load will see the new values
+        # Superseded heap entries are skipped lazily when they surface
+        self._scheduled.pop(item_id, None)
+        if due_date is None or status not in OPEN_PROGRESS_STATUSES:
+            return
+        due_date = bson_datetime(due_date)
+        if due_date - self.lead < self.window_end:
+            # Inside the loaded window (or already past): the window load won't see it
+            self._push(item_id, due_date)
+            self._wake.set()
+
+    async def _load_window(self, start: datetime, end: datetime, due_from: Optional[datetime] = None):
+        """Schedule the reminders firing in [start, end), plus any still due from due_from on"""
+        cursor = db.progress_items.find({
+            "status": {"$in": OPEN_PROGRESS_STATUSES},
+            "due_date": {"$gte": min(start + self.lead, due_from or start + self.lead), "$lt": end + self.lead}
+        }, REMINDER_ITEM_FIELDS)
+        async for item in cursor:
+            if item.get("reminded_due_date") != item["due_date"]:
+                self._push(item["id"], item["due_date"])
+                self.loaded += 1
+        self.windows += 1
+
+    async def _fire(self, item_id: str, due_date: datetime):
+        claimed = await db.progress_items.find_one_and_update(
+            {"id": item_id, "due_date": due_date, "status": {"$in": OPEN_PROGRESS_STATUSES},
+             "reminded_due_date": {"$ne": due_date}},
+            {"$set": {"reminded_due_date": due_date, "reminder_sent_at": datetime.utcnow()}},
+            projection=REMINDER_ITEM_FIELDS
+        )
+        if claimed is None:
+            self.unclaimed += 1  # completed, moved or already reminded elsewhere
+            return
+        reminder = {
+            "type": "progress_item_due",
+            "user_id": claimed["user_id"],
+            "item_id": item_id,
+            "title": claimed["title"],
+            "category": claimed.get("category"),
+            "due_date": due_date,
+            "fire_at": due_date - self.lead
+        }
+        for sink in self.sinks:
+            try:
+                await sink.deliver(reminder)
+            except Exception as e:
+                self.sink_errors += 1
+                logging.getLogger(__name__).error(f"Reminder sink {sink.name} failed for item {item_id}: {e}")
+        self.fired += 1
+
+    async def _advance(self):
+        # Everything firing before window_end has been handed out; move on
+        # and load the next window before persisting the new watermark
+        await self._load_window(self.window_end, self.window_end + self.window)
+        self.watermark = self.window_end
+        self.window_end += self.window
+        await db.rollup_state.update_one({"_id": REMINDER_STATE_ID}, {"$set": {"watermark": self.watermark}})
+
+    async def _run(self):
+        while True:
+            try:
+                if self.window_end is None:
+                    state = await db.rollup_state.find_one_and_update(
+                        {"_id": REMINDER_STATE_ID},
+                        {"$setOnInsert": {"watermark": bson_datetime(datetime.utcnow())}},
+                        upsert=True,
+                        return_document=ReturnDocument.AFTER
+                    )
+                    # Items already inside the lead window when the scheduler starts
+                    # (due in [now, now + lead)) fire right away unless reminded before
+                    await self._load_window(state["watermark"], state["watermark"] + self.window, due_from=datetime.utcnow())
+                    self.watermark = state["watermark"]
+                    self.window_end = self.watermark + self.window
+                now = datetime.utcnow()
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, item_id, due_date = heapq.heappop(self._heap)
+                    if self._scheduled.get(item_id) != due_date:
+                        self.stale += 1
+                        continue
+                    del self._scheduled[item_id]
+                    await self._fire(item_id, due_date)
+                if now >= self.window_end:
+                    # Catching up after downtime walks forward one window at a time
+                    await self._advance()
+                    continue
+                next_at = min(self._heap[0][0], self.window_end) if self._heap else self.window_end
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), (next_at - now).total_seconds())
+                except asyncio.TimeoutError:
+                    pass
+            except PyMongoError as e:
+                logging.getLogger(__name__).error(f"Reminder scheduler error, retrying: {e}")
+                await asyncio.sleep(5)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._scheduled),
+            "heap_size": len(self._heap),
+            "watermark": self.watermark,
+            "window_end": self.window_end,
+            "lead_hours": self.lead.total_seconds() / 3600,
+            "sinks": [sink.name for sink in self.sinks],
+            "windows_loaded": self.windows,
+            "loaded": self.loaded,
+            "fired": self.fired,
+            "stale_skipped": self.stale,
+            "unclaimed": self.unclaimed,
+            "sink_errors": self.sink_errors
+        }
+
+reminder_scheduler = ReminderScheduler(
+    timedelta(hours=REMINDER_LEAD_HOURS), timedelta(minutes=REMINDER_WINDOW_MINUTES), build_reminder_sinks(REMINDER_SINKS)
+)
+
+@api_router.get("/reminders/inbox")
+async def get_reminder_inbox(current_user: User = Depends(get_current_user), unread_only: bool = False, limit: int = 20):
+    limit = max(1, min(limit, 100))
+    query: Dict[str, Any] = {"user_id": current_user.id}
+    if unread_only:
+        query["read"] = False
+    notifications = await db.notifications.find(query, {"_id": 0}).sort("created_at", DESCENDING).limit(limit).to_list(length=limit)
+    unread = await db.notifications.count_documents({"user_id": current_user.id, "read": False})
+    return {"notifications": notifications, "unread": unread}
+
+@api_router.post("/reminders/inbox/{notification_id}/read")
+async def mark_reminder_read(notification_id: str, current_user: User = Depends(get_current_user)):
+    result = await db.notifications.update_one({"id": notification_id, "user_id": current_user.id}, {"$set": {"read": True}})
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return {"message": "Notification marked as read"}
+
+# Logistics endpoints
+LOGISTICS_SERVICE_TYPES = sorted(set(p["service_type"] for p in LOGISTICS_PROVIDERS))
+LOGISTICS_PROVIDER_RECORDS = tuple(
+    LogisticsProvider(**{"id": stable_id(p["company_name"], p["service_type"]), **p}).dict()
+    for p in LOGISTICS_PROVIDERS
+)
+LOGISTICS_PROVIDER_POSITIONS = {record["id"]: i for i, record in enumerate(LOGISTICS_PROVIDER_RECORDS)}
+
+def build_logistics_providers(service_type: Optional[str] = None):
+    providers = [
+        provider for provider in LOGISTICS_PROVIDER_RECORDS
+        if not service_type or provider["service_type"] == service_type
+    ]
     
     return {
         "providers": providers,
         "total": len(providers),
-        "service_types": list(set([p["service_type"] for p in LOGISTICS_PROVIDERS]))
+        "service_types": LOGISTICS_SERVICE_TYPES
     }
 
+@api_router.get("/logistics/providers")
+async def get_logistics_providers(request: Request, service_type: Optional[str] = None,
+                                  limit: Optional[int] = None, after: Optional[str] = None, fields: Optional[str] = None):
+    if limit is not None or after is not None or fields:
+        projection = parse_fields(fields, LogisticsProvider)
+        positions = tuple(
+            i for i, provider in enumerate(LOGISTICS_PROVIDER_RECORDS)
+            if not service_type or provider["service_type"] == service_type
+        )
+        page, next_cursor = paginate_positions(
+            positions, LOGISTICS_PROVIDER_RECORDS, LOGISTICS_PROVIDER_POSITIONS, page_size(limit, after), after
+        )
+        return {
+            "providers": [project_fields(LOGISTICS_PROVIDER_RECORDS[i], projection) for i in page],
+            "total": len(positions),
+            "next_cursor": next_cursor,
+            "service_types": LOGISTICS_SERVICE_TYPES
+        }
+    
+    if service_type and service_type not in LOGISTICS_SERVICE_TYPES:
+        # Every unknown type has the same empty payload; don't key the cache on it
+        service_type = "unknown"
+    return precomputed_response(
+        request,
+        f"logistics/providers?service_type={service_type or ''}",
+        lambda: build_logistics_providers(service_type)
+    )
+
+MOVING_COST_CALCULATOR = {
+    "base_costs": {
+        "full_service": {"min": 8000, "max": 15000, "average": 11500},
+        "container": {"min": 2800, "max": 7500, "average": 5150},
+        "air_freight": {"min": 2000, "max": 8000, "average": 5000},
+        "storage": {"min": 150, "max": 400, "average": 275}
+    },
+    "additional_costs": {
+        "insurance": {"percentage": 2.5, "description": "2.5% of shipment value"},
+        "customs_duty": {"range": "0-25%", "description": "Varies by item type"},
+        "temporary_storage": {"cost": 50, "unit": "per cubic meter per week"},
+        "express_customs": {"cost": 200, "description": "Fast-track customs clearance"},
+        "pet_shipping": {"cost": 2500, "description": "Per pet including quarantine"},
+        "vehicle_shipping": {"cost": 3500, "description": "Car shipping via container"}
+    },
+    "cost_factors": [
+        "Volume of household goods",
+        "Distance and accessibility",
+        "Service level selected",
+        "Insurance coverage",
+        "Seasonal demand",
+        "Customs complexity"
+    ]
+}
+
 @api_router.get("/logistics/cost-calculator")
-async def get_cost_calculator():
-    return {
-        "base_costs": {
-            "full_service": {"min": 8000, "max": 15000, "average": 11500},
-            "container": {"min": 2800, "max": 7500, "average": 5150},
-            "air_freight": {"min": 2000, "max": 8000, "average": 5000},
-            "storage": {"min": 150, "max": 400, "average": 275}
-        },
-        "additional_costs": {
-            "insurance": {"percentage": 2.5, "description": "2.5% of shipment value"},
-            "customs_duty": {"range": "0-25%", "description": "Varies by item type"},
-            "temporary_storage": {"cost": 50, "unit": "per cubic meter per week"},
-            "express_customs": {"cost": 200, "description": "Fast-track customs clearance"},
-            "pet_shipping": {"cost": 2500, "description": "Per pet including quarantine"},
-            "vehicle_shipping": {"cost": 3500, "description": "Car shipping via container"}
-        },
-        "cost_factors": [
-            "Volume of household goods",
-            "Distance and accessibility",
-            "Service level selected",
-            "Insurance coverage",
-            "Seasonal demand",
-            "Customs complexity"
-        ]
-    }
+async def get_cost_calculator(request: Request):
+    return precomputed_response(request, "logistics/cost-calculator", lambda: MOVING_COST_CALCULATOR)
+
+MOVING_CHECKLIST = {
+    "8_weeks_before": [
+        "Research and get quotes from moving companies",
+        "Start decluttering and deciding what to ship",
+        "Research UK customs regulations",
+        "Begin inventory of valuable items",
+        "Research temporary accommodation in UK"
+    ],
+    "6_weeks_before": [
+        "Book moving company and confirm dates",
+        "Arrange temporary storage if needed",
+        "Start using up frozen/perishable food",
+        "Research UK utility providers",
+        "Plan farewell events with friends/family"
+    ],
+    "4_weeks_before": [
+        "Confirm shipping dates and logistics",
+        "Start serious packing of non-essentials",
+        "Arrange mail forwarding with USPS",
+        "Notify current utility companies of move",
+        "Research UK mobile phone providers"
+    ],
+    "2_weeks_before": [
+        "Finish packing all non-essential items",
+        "Confirm travel arrangements to UK",
+        "Pack essential suitcase for first weeks",
+        "Say goodbye to local services (dentist, etc.)",
+        "Download offline maps and UK apps"
+    ],
+    "1_week_before": [
+        "Pack survival kit for first days in UK",
+        "Confirm pickup time with movers",
+        "Clean out refrigerator completely",
+        "Pack important documents separately",
+        "Charge all electronic devices"
+    ],
+    "moving_day": [
+        "Be present for pickup",
+        "Take photos of valuable items",
+        "Keep inventory list with you",
+        "Check all rooms are empty",
+        "Get contact details for UK delivery"
+    ]
+}
 
 @api_router.get("/logistics/checklist")
-async def get_moving_checklist():
-    return {
-        "8_weeks_before": [
-            "Research and get quotes from moving companies",
-            "Start decluttering and deciding what to ship",
-            "Research UK customs regulations",
-            "Begin inventory of valuable items",
-            "Research temporary accommodation in UK"
-        ],
-        "6_weeks_before": [
-            "Book moving company and confirm dates",
-            "Arrange temporary storage if needed",
-            "Start using up frozen/perishable food",
-            "Research UK utility providers",
-            "Plan farewell events with friends/family"
-        ],
-        "4_weeks_before": [
-            "Confirm shipping dates and logistics",
-            "Start serious packing of non-essentials",
-            "Arrange mail forwarding with USPS",
-            "Notify current utility companies of move",
-            "Research UK mobile phone providers"
-        ],
-        "2_weeks_before": [
-            "Finish packing all non-essential items",
-            "Confirm travel arrangements to UK",
-            "Pack essential suitcase for first weeks",
-            "Say goodbye to local services (dentist, etc.)",
-            "Download offline maps and UK apps"
-        ],
-        "1_week_before": [
-            "Pack survival kit for first days in UK",
-            "Confirm pickup time with movers",
-            "Clean out refrigerator completely",
-            "Pack important documents separately",
-            "Charge all electronic devices"
-        ],
-        "moving_day": [
-            "Be present for pickup",
-            "Take photos of valuable items",
-            "Keep inventory list with you",
-            "Check all rooms are empty",
-            "Get contact details for UK delivery"
-        ]
-    }
+async def get_moving_checklist(request: Request):
+    return precomputed_response(request, "logistics/checklist", lambda: MOVING_CHECKLIST)
 
 # Analytics endpoints
 @api_router.get("/analytics/overview")
 async def get_analytics_overview(current_user: User = Depends(get_current_user)):
-    user_completed_steps = current_user.completed_steps
+    mask = current_user.completed_mask
+    completed_count = mask.bit_count()
     total_steps = len(RELOCATION_TIMELINE)
-    completion_percentage = (len(user_completed_steps) / total_steps) * 100
+    completion_percentage = (completed_count / total_steps) * 100
     
     # Calculate category progress
-    category_progress = {}
-    for step in RELOCATION_TIMELINE:
-        category = step["category"]
-        if category not in category_progress:
-            category_progress[category] = {"completed": 0, "total": 0}
-        category_progress[category]["total"] += 1
-        if step["id"] in user_completed_steps:
-            category_progress[category]["completed"] += 1
+    category_progress = {
+        name: {"completed": (mask & category["mask"]).bit_count(), "total": len(category["steps"])}
+        for name, category in TIMELINE_CATEGORIES.items()
+    }
     
     # Calculate estimated costs based on progress
     estimated_costs = {
@@ -1489,9 +3895,9 @@ async def get_analytics_overview(current_user: User = Depends(get_current_user))
     return {
         "user_progress": {
             "overall_completion": completion_percentage,
-            "completed_steps": len(user_completed_steps),
+            "completed_steps": completed_count,
             "total_steps": total_steps,
-            "current_phase": get_current_phase(user_completed_steps),
+            "current_phase": get_current_phase(mask),
             "category_breakdown": category_progress
         },
         "cost_breakdown": estimated_costs,
@@ -1515,24 +3921,94 @@ async def get_analytics_overview(current_user: User = Depends(get_current_user))
         ]
     }
 
+HISTORY_GRANULARITIES = ("day", "week", "month")
+MAX_HISTORY_POINTS = 400
+
+def history_buckets(from_date: date, to_date: date, granularity: str) -> List[date]:
+    if granularity == "day":
+        current = from_date
+    elif granularity == "week":
+        current = from_date - timedelta(days=from_date.weekday())
+    else:
+        current = from_date.replace(day=1)
+    buckets = []
+    while current <= to_date and len(buckets) <= MAX_HISTORY_POINTS:
+        buckets.append(current)
+        if granularity == "day":
+            current += timedelta(days=1)
+        elif granularity == "week":
+            current += timedelta(weeks=1)
+        else:
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return buckets
+
 @api_router.get("/analytics/progress-history")
-async def get_progress_history(current_user: User = Depends(get_current_user)):
-    # Simulate progress history over time
-    progress_history = [
-        {"date": "2024-11-01", "completed_steps": 2, "completion_percentage": 5.9},
-        {"date": "2024-11-15", "completed_steps": 3, "completion_percentage": 8.8},
-        {"date": "2024-12-01", "completed_steps": 5, "completion_percentage": 14.7},
-        {"date": "2024-12-15", "completed_steps": 5, "completion_percentage": 14.7},
-        {"date": "2025-01-01", "completed_steps": 5, "completion_percentage": 14.7}
-    ]
+async def get_progress_history(
+    from_date: Optional[date] = Query(default=None, alias="from"),
+    to_date: Optional[date] = Query(default=None, alias="to"),
+    granularity: str = "week",
+    current_user: User = Depends(get_current_user)
+):
+    if granularity not in HISTORY_GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(HISTORY_GRANULARITIES)}")
+    to_date = to_date or datetime.utcnow().date()
+    from_date = from_date or to_date - timedelta(weeks=12)
+    if from_date > to_date:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    buckets = history_buckets(from_date, to_date, granularity)
+    if len(buckets) > MAX_HISTORY_POINTS:
+        raise HTTPException(status_code=400, detail=f"Range too large: at most {MAX_HISTORY_POINTS} {granularity}s")
+    
+    completed = [0] * len(buckets)
+    uncompleted = [0] * len(buckets)
+    net_after_range = 0
+    # Later days are read too: the series is anchored to the user's current
+    # completion count and walked backwards
+    async for rollup in db.progress_daily_rollups.find(
+        {"user_id": current_user.id, "day": {"$gte": utc_day(buckets[0])}},
+        {"_id": 0, "day": 1, "live": 1, "backfill": 1}
+    ):
+        day_completed = rollup.get("live", {}).get("completed", 0) + rollup.get("backfill", {}).get("completed", 0)
+        day_uncompleted = rollup.get("live", {}).get("uncompleted", 0) + rollup.get("backfill", {}).get("uncompleted", 0)
+        day = rollup["day"].date()
+        if day > to_date:
+            net_after_range += day_completed - day_uncompleted
+            continue
+        index = bisect.bisect_right(buckets, day) - 1
+        completed[index] += day_completed
+        uncompleted[index] += day_uncompleted
+    
+    total_steps = len(RELOCATION_TIMELINE)
+    completed_at_end = [0] * len(buckets)
+    count = current_user.completed_mask.bit_count() - net_after_range
+    for index in range(len(buckets) - 1, -1, -1):
+        completed_at_end[index] = min(max(count, 0), total_steps)
+        count -= completed[index] - uncompleted[index]
+    
+    progress_history = []
+    milestones = []
+    previous_percentage = min(max(count, 0), total_steps) / total_steps * 100
+    for index, bucket in enumerate(buckets):
+        percentage = completed_at_end[index] / total_steps * 100
+        progress_history.append({
+            "date": bucket.isoformat(),
+            "completed_steps": completed_at_end[index],
+            "completion_percentage": round(percentage, 1),
+            "steps_completed": completed[index],
+            "steps_uncompleted": uncompleted[index]
+        })
+        for threshold in (25, 50, 75, 100):
+            if previous_percentage < threshold <= percentage:
+                milestones.append({"date": bucket.isoformat(), "milestone": f"Reached {threshold}% completion"})
+        previous_percentage = percentage
+    milestones.append({"date": to_date.isoformat(), "milestone": "Current status"})
     
     return {
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "granularity": granularity,
         "progress_history": progress_history,
-        "milestones": [
-            {"date": "2024-11-01", "milestone": "Started relocation planning"},
-            {"date": "2024-12-01", "milestone": "Completed initial research phase"},
-            {"date": "2025-01-01", "milestone": "Current status"}
-        ]
+        "milestones": milestones
     }
 
 @api_router.get("/analytics/cost-tracking")
@@ -1560,50 +4036,54 @@ async def get_cost_tracking(current_user: User = Depends(get_current_user)):
     }
 
 # Original endpoints (keeping for compatibility)
+PHOENIX_LOCATION_DATA = {
+    "location_name": "Phoenix, Arizona",
+    "cost_of_living_index": 98.2,
+    "housing_cost_index": 89.5,
+    "safety_index": 6.8,
+    "weather_info": {
+        "avg_temp_f": 75,
+        "sunny_days": 299,
+        "humidity": 38,
+        "climate": "Desert"
+    },
+    "job_market_score": 7.2,
+    "education_score": 6.5,
+    "healthcare_score": 7.1,
+    "population": 1608139,
+    "median_income": 62055
+}
+
 @api_router.get("/locations/phoenix")
-async def get_phoenix_data():
-    return {
-        "location_name": "Phoenix, Arizona",
-        "cost_of_living_index": 98.2,
-        "housing_cost_index": 89.5,
-        "safety_index": 6.8,
-        "weather_info": {
-            "avg_temp_f": 75,
-            "sunny_days": 299,
-            "humidity": 38,
-            "climate": "Desert"
-        },
-        "job_market_score": 7.2,
-        "education_score": 6.5,
-        "healthcare_score": 7.1,
-        "population": 1608139,
-        "median_income": 62055
-    }
+async def get_phoenix_data(request: Request):
+    return precomputed_response(request, "locations/phoenix", lambda: PHOENIX_LOCATION_DATA)
+
+PEAK_DISTRICT_LOCATION_DATA = {
+    "location_name": "Peak District, UK",
+    "cost_of_living_index": 112.8,
+    "housing_cost_index": 125.3,
+    "safety_index": 8.9,
+    "weather_info": {
+        "avg_temp_f": 48,
+        "sunny_days": 120,
+        "humidity": 78,
+        "climate": "Temperate Oceanic"
+    },
+    "job_market_score": 6.8,
+    "education_score": 8.9,
+    "healthcare_score": 9.2,
+    "population": 38000,
+    "median_income": 35000
+}
 
 @api_router.get("/locations/peak-district")
-async def get_peak_district_data():
-    return {
-        "location_name": "Peak District, UK",
-        "cost_of_living_index": 112.8,
-        "housing_cost_index": 125.3,
-        "safety_index": 8.9,
-        "weather_info": {
-            "avg_temp_f": 48,
-            "sunny_days": 120,
-            "humidity": 78,
-            "climate": "Temperate Oceanic"
-        },
-        "job_market_score": 6.8,
-        "education_score": 8.9,
-        "healthcare_score": 9.2,
-        "population": 38000,
-        "median_income": 35000
-    }
+async def get_peak_district_data(request: Request):
+    return precomputed_response(request, "locations/peak-district", lambda: PEAK_DISTRICT_LOCATION_DATA)
 
 @api_router.get("/comparison/phoenix-to-peak-district")
 async def get_relocation_comparison(current_user: User = Depends(get_current_user)):
-    phoenix_data = await get_phoenix_data()
-    peak_district_data = await get_peak_district_data()
+    phoenix_data = PHOENIX_LOCATION_DATA
+    peak_district_data = PEAK_DISTRICT_LOCATION_DATA
     
     comparison = {
         "from_location": phoenix_data,
@@ -1629,39 +4109,43 @@ async def get_relocation_comparison(current_user: User = Depends(get_current_use
     
     return comparison
 
+PHOENIX_HOUSING_DATA = {
+    "median_home_price": 450000,
+    "median_rent": 1650,
+    "price_per_sqft": 185,
+    "market_trend": "stable",
+    "popular_neighborhoods": [
+        "Scottsdale", "Tempe", "Chandler", "Gilbert", "Glendale"
+    ],
+    "housing_types": {
+        "single_family": 65,
+        "condos": 20,
+        "apartments": 15
+    }
+}
+
 @api_router.get("/housing/phoenix")
-async def get_phoenix_housing():
-    return {
-        "median_home_price": 450000,
-        "median_rent": 1650,
-        "price_per_sqft": 185,
-        "market_trend": "stable",
-        "popular_neighborhoods": [
-            "Scottsdale", "Tempe", "Chandler", "Gilbert", "Glendale"
-        ],
-        "housing_types": {
-            "single_family": 65,
-            "condos": 20,
-            "apartments": 15
-        }
+async def get_phoenix_housing(request: Request):
+    return precomputed_response(request, "housing/phoenix", lambda: PHOENIX_HOUSING_DATA)
+
+PEAK_DISTRICT_HOUSING_DATA = {
+    "median_home_price": 320000,
+    "median_rent": 950,
+    "price_per_sqft": 240,
+    "market_trend": "rising",
+    "popular_areas": [
+        "Buxton", "Bakewell", "Matlock", "Hathersage", "Castleton"
+    ],
+    "housing_types": {
+        "cottages": 45,
+        "terraced": 30,
+        "detached": 25
     }
+}
 
 @api_router.get("/housing/peak-district")
-async def get_peak_district_housing():
-    return {
-        "median_home_price": 320000,
-        "median_rent": 950,
-        "price_per_sqft": 240,
-        "market_trend": "rising",
-        "popular_areas": [
-            "Buxton", "Bakewell", "Matlock", "Hathersage", "Castleton"
-        ],
-        "housing_types": {
-            "cottages": 45,
-            "terraced": 30,
-            "detached": 25
-        }
-    }
+async def get_peak_district_housing(request: Request):
+    return precomputed_response(request, "housing/peak-district", lambda: PEAK_DISTRICT_HOUSING_DATA)
 
 @api_router.get("/jobs/opportunities")
 async def get_job_opportunities(current_user: User = Depends(get_current_user)):
@@ -1739,7 +4223,6 @@ async def download_relocate_helper():
 
 @api_router.get("/download/property-finder.zip")
 async def download_property_finder():
-    from fastapi.responses import JSONResponse
     return JSONResponse({
         "message": "Property Finder extension coming soon!",
         "status": "development"
@@ -1747,7 +4230,7 @@ async def download_property_finder():
 
 @api_router.get("/dashboard/overview")
 async def get_dashboard_overview(current_user: User = Depends(get_current_user)):
-    completed_count = len(current_user.completed_steps)
+    completed_count = current_user.completed_mask.bit_count()
     total_steps = len(RELOCATION_TIMELINE)
     completion_percentage = (completed_count / total_steps) * 100
     
@@ -1757,7 +4240,7 @@ async def get_dashboard_overview(current_user: User = Depends(get_current_user))
             "completion_percentage": round(completion_percentage, 1),
             "completed_steps_count": completed_count,
             "total_steps": total_steps,
-            "current_phase": get_current_phase(current_user.completed_steps)
+            "current_phase": get_current_phase(current_user.completed_mask)
         },
         "quick_stats": {
             "days_until_move": 120,
@@ -1773,6 +4256,18 @@ async def get_dashboard_overview(current_user: User = Depends(get_current_user))
         ]
     }
 
+@api_router.get("/metrics")
+async def get_metrics(admin_user: User = Depends(get_admin_user)):
+    return {
+        "user_cache": user_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "timeline_responses": timeline_responses.stats(),
+        "progress_log_writer": progress_log_writer.stats(),
+        "progress_counters": {key: value for key, value in progress_counter_state.items() if key != "task"},
+        "timeline_schedule": {"cached_users": len(timeline_schedules), **timeline_schedule_stats},
+        "reminders": reminder_scheduler.stats()
+    }
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -1791,10 +4286,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Indexes required by the queries above, keyed by collection. create_indexes is
+# a no-op for indexes that already exist with the same spec, so this is safe to
+# run on every startup.
+DB_INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "progress_items": [
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_item_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("category", ASCENDING), ("status", ASCENDING)], name="user_category_status"),
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING), ("due_date", ASCENDING)], name="user_status_due"),
+        IndexModel([("status", ASCENDING), ("due_date", ASCENDING)], name="status_due"),
+    ],
+    "notifications": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+        IndexModel([("user_id", ASCENDING), ("read", ASCENDING)], name="user_read"),
+    ],
+    "progress_logs": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_timestamp"),
+        IndexModel([("timestamp", ASCENDING)], name="timestamp"),
+    ],
+    "progress_daily_rollups": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], unique=True, name="user_day"),
+    ],
+    "jobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "password_resets": [
+        IndexModel([("username", ASCENDING), ("reset_code", ASCENDING)], name="username_reset_code"),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+async def ensure_indexes():
+    for collection_name, indexes in DB_INDEXES.items():
+        try:
+            await db[collection_name].create_indexes(indexes)
+        except OperationFailure as e:
+            # e.g. duplicate usernames blocking the unique index; keep serving
+            logger.error(f"Could not create indexes on {collection_name}: {e}")
+
 @app.on_event("startup")
 async def startup_db():
+    await ensure_indexes()
     await create_default_user()
+    await backfill_completed_masks()
+    await normalize_progress_item_dates()
+    await seed_jobs_collection()
+    await refresh_job_catalog(force=True)
+    progress_log_writer.start()
+    progress_rollup_state["backfill_task"] = asyncio.create_task(run_progress_rollup_backfill())
+    progress_counter_state["task"] = asyncio.create_task(run_progress_counter_reconciler())
+    reminder_scheduler.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    backfill_task = progress_rollup_state["backfill_task"]
+    if backfill_task is not None and not backfill_task.done():
+        backfill_task.cancel()  # resumes from its watermark on the next start
+    if progress_counter_state["task"] is not None:
+        progress_counter_state["task"].cancel()
+    if job_catalog_state["task"] is not None:
+        job_catalog_state["task"].cancel()
+    await reminder_scheduler.stop()  # resumes from its persisted watermark on the next start
+    await progress_log_writer.close()
     client.close()
+    password_hasher.shutdown()
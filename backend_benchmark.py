@@ -0,0 +1,120 @@
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+import server  # noqa: E402
+
+WORDS = [
+    "marketing", "tourism", "digital", "outdoor", "instructor", "software", "developer", "react", "node",
+    "farm", "organic", "livestock", "hotel", "hospitality", "ranger", "conservation", "wildlife", "writer",
+    "content", "seo", "analytics", "social", "media", "climbing", "caving", "hiking", "pension", "flexible",
+    "training", "remote", "cloud", "agile", "budget", "leadership", "customer", "service", "events", "guest",
+    "survey", "environmental", "driving", "license", "accommodation", "bonus", "equipment", "portfolio",
+    "research", "campaign", "strategy", "python", "javascript", "kitchen", "chef", "retail", "warehouse",
+    "logistics", "nurse", "care", "teacher", "school", "accountant", "finance", "engineer", "maintenance",
+]
+WORDS += [f"term{i}" for i in range(2000)]
+TOWNS = ["Bakewell", "Buxton", "Castleton", "Matlock", "Hathersage", "Edale", "Leek", "Glossop", "Remote (UK)"]
+CATEGORIES = ["Technology", "Hospitality", "Agriculture", "Conservation", "Marketing & Tourism", "Outdoor Recreation"]
+JOB_TYPES = ["full-time", "part-time", "contract", "remote", "freelance"]
+
+
+def synthetic_jobs(count, seed=42):
+    rng = random.Random(seed)
+    now = datetime.now()
+    for i in range(count):
+        yield {
+            "id": f"bench-{i}",
+            "title": " ".join(rng.choices(WORDS[:64], k=3)).title(),
+            "company": f"{rng.choice(WORDS).title()} Ltd",
+            "location": f"{rng.choice(TOWNS)}, Peak District",
+            "salary": f"£{rng.randint(18, 60)},000 - £{rng.randint(61, 90)},000",
+            "description": " ".join(rng.choices(WORDS, k=25)),
+            "requirements": [" ".join(rng.choices(WORDS, k=4)) for _ in range(4)],
+            "benefits": [" ".join(rng.choices(WORDS, k=3)) for _ in range(3)],
+            "job_type": rng.choice(JOB_TYPES),
+            "posted_date": now - timedelta(days=rng.randint(0, 60)),
+            "application_url": "https://example.com/apply",
+            "category": rng.choice(CATEGORIES),
+        }
+
+
+def measure(func, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def bench_job_search(job_count=30000, runs=2000, target_ms=1.0):
+    """BM25 query latency over a synthetic catalog of job_count postings"""
+    print(f"\n🔍 Job search: building catalog of {job_count} jobs...")
+    catalog = server.JobCatalog.from_records(synthetic_jobs(job_count))
+    index = server.JobSearchIndex()
+    started = time.perf_counter()
+    index.apply_catalog_change(catalog, catalog.jobs, [])
+    print(f"   Index built in {time.perf_counter() - started:.2f}s ({len(index._postings)} terms)")
+
+    rng = random.Random(7)
+    queries = [" ".join(rng.choices(WORDS, k=rng.randint(1, 3))) for _ in range(runs)]
+    # Warm the per-term arrays the way a running server would
+    for query in queries:
+        index.search(query, catalog)
+
+    query_iter = iter(queries * 2)
+    p50, p99 = measure(lambda: index.search(next(query_iter), catalog), runs)
+    print(f"   Unfiltered: p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+    filtered_p50, filtered_p99 = measure(
+        lambda: index.search(next(query_iter), catalog, category="Technology", job_type="full-time"), runs
+    )
+    print(f"   Filtered:   p50 {filtered_p50:.3f} ms, p99 {filtered_p99:.3f} ms")
+
+    # Incremental update: re-index a single changed job
+    updated = dict(catalog.jobs[0], title="Senior Python Engineer")
+    started = time.perf_counter()
+    index.apply_catalog_change(catalog, [updated], [])
+    print(f"   Incremental single-job update: {(time.perf_counter() - started) * 1000:.3f} ms")
+
+    passed = p50 < target_ms and filtered_p50 < target_ms
+    print(f"{'✅' if passed else '❌'} Median query latency target: < {target_ms} ms")
+    return passed
+
+
+def bench_job_recommendations(job_count=100000, runs=500, target_ms=5.0):
+    """TF-IDF profile scoring latency over a synthetic catalog of job_count jobs"""
+    print(f"\n🎯 Job recommendations: building catalog of {job_count} jobs...")
+    catalog = server.JobCatalog.from_records(synthetic_jobs(job_count))
+    recommender = server.JobRecommender()
+    started = time.perf_counter()
+    recommender.apply_catalog_change(catalog, catalog.jobs, [])
+    print(f"   TF-IDF matrix built in {time.perf_counter() - started:.2f}s ({len(recommender._matrix[0])} terms)")
+
+    rng = random.Random(11)
+    profiles = [
+        [" ".join(rng.choices(WORDS, k=4)) for _ in range(rng.randint(3, 8))]
+        for _ in range(runs)
+    ]
+    profile_iter = iter(profiles)
+    p50, p99 = measure(lambda: recommender.recommend(catalog, next(profile_iter), 10), runs)
+    print(f"   Top-10 scoring: p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+
+    passed = p50 < target_ms
+    print(f"{'✅' if passed else '❌'} Median scoring latency target: < {target_ms} ms")
+    return passed
+
+
+def main():
+    results = [bench_job_search(), bench_job_recommendations()]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,11 @@
 
+import os
 import requests
 import sys
+from concurrent.futures import ThreadPoolExecutor
 import json
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
 class RelocateMeAPITester:
     def __init__(self, base_url):
@@ -27,6 +30,8 @@ class RelocateMeAPITester:
                 response = requests.get(url, headers=headers)
             elif method == 'POST':
                 response = requests.post(url, json=data, headers=headers)
+            elif method == 'PUT':
+                response = requests.put(url, json=data, headers=headers)
 
             success = response.status_code == expected_status
             
@@ -211,6 +216,60 @@ class RelocateMeAPITester:
         )
         return success, response
     
+    def test_query_job_listings(self, name, query, expected_status=200):
+        """Test job listings with salary, pagination, projection or location parameters"""
+        success, response = self.run_test(
+            f"Get Job Listings ({name})",
+            "GET",
+            f"jobs/listings?{query}",
+            expected_status
+        )
+        return success, response
+    
+    def check(self, name, condition, detail=""):
+        """Record a check on response content"""
+        self.tests_run += 1
+        if condition:
+            self.tests_passed += 1
+            print(f"✅ {name}")
+        else:
+            print(f"❌ {name}{f' - {detail}' if detail else ''}")
+        self.test_results.append({"name": name, "url": "-", "method": "CHECK", "success": bool(condition), "error": detail})
+        return bool(condition)
+    
+    def test_search_jobs(self, query):
+        """Test full-text job search"""
+        success, response = self.run_test(
+            f"Search Jobs ({query})",
+            "GET",
+            f"jobs/search?q={query}",
+            200
+        )
+        return success, response
+    
+    def test_update_skills(self, skills):
+        """Test storing the user's skills"""
+        success, response = self.run_test(
+            "Update Skills",
+            "PUT",
+            "auth/me/skills",
+            200,
+            data={"skills": skills},
+            auth_required=True
+        )
+        return success, response
+    
+    def test_get_recommended_jobs(self):
+        """Test job recommendations for the current user"""
+        success, response = self.run_test(
+            "Get Recommended Jobs",
+            "GET",
+            "jobs/recommended",
+            200,
+            auth_required=True
+        )
+        return success, response
+    
     def test_get_featured_jobs(self):
         """Test getting featured jobs"""
         success, response = self.run_test(
@@ -251,6 +310,18 @@ class RelocateMeAPITester:
         )
         return success, response
     
+    def test_check_visa_eligibility(self, applicants):
+        """Test batch visa eligibility screening"""
+        success, response = self.run_test(
+            "Check Visa Eligibility",
+            "POST",
+            "visa/eligibility",
+            200,
+            data={"applicants": applicants},
+            auth_required=True
+        )
+        return success, response
+    
     def test_get_visa_checklist(self):
         """Test getting visa checklist"""
         success, response = self.run_test(
@@ -324,6 +395,167 @@ class RelocateMeAPITester:
         )
         return success, response
     
+    def test_get_timeline_schedule(self):
+        """Test the projected timeline schedule and critical path"""
+        success, response = self.run_test(
+            "Get Timeline Schedule",
+            "GET",
+            "timeline/schedule",
+            200,
+            auth_required=True
+        )
+        return success, response
+    
+    def test_update_step_progress_batch(self, updates):
+        """Test applying several timeline step changes at once"""
+        success, response = self.run_test(
+            "Update Step Progress (batch)",
+            "POST",
+            "timeline/update-progress/batch",
+            200,
+            data={"updates": updates},
+            auth_required=True
+        )
+        return success, response
+    
+    def test_get_progress_history(self, granularity="week"):
+        """Test progress history built from daily rollups"""
+        success, response = self.run_test(
+            f"Get Progress History ({granularity})",
+            "GET",
+            f"analytics/progress-history?granularity={granularity}",
+            200,
+            auth_required=True
+        )
+        return success, response
+    
+    def test_get_progress_items(self):
+        """Test listing progress items with their statistics"""
+        success, response = self.run_test(
+            "Get Progress Items",
+            "GET",
+            "progress/items",
+            200,
+            auth_required=True
+        )
+        return success, response
+    
+    def test_get_progress_dashboard(self):
+        """Test the progress dashboard built from the maintained counters"""
+        success, response = self.run_test(
+            "Get Progress Dashboard",
+            "GET",
+            "progress/dashboard",
+            200,
+            auth_required=True
+        )
+        return success, response
+    
+    def test_reconcile_progress_counters(self, admin_token):
+        """Test running the progress counter reconciler as an admin"""
+        user_token, self.token = self.token, admin_token
+        try:
+            success, response = self.run_test(
+                "Reconcile Progress Counters",
+                "POST",
+                "admin/progress/reconcile",
+                200,
+                auth_required=True
+            )
+        finally:
+            self.token = user_token
+        return success, response
+    
+    def send(self, method, endpoint, data=None, token=None):
+        """Send a request without recording it as a test; used to generate concurrent load"""
+        headers = {'Authorization': f'Bearer {token or self.token}'}
+        return requests.request(method, f"{self.base_url}/api/{endpoint}", json=data, headers=headers).status_code
+    
+    def fetch(self, endpoint):
+        """GET a JSON response without recording it as a test; used for polling"""
+        response = requests.get(f"{self.base_url}/api/{endpoint}", headers={'Authorization': f'Bearer {self.token}'})
+        return response.json() if response.ok else {}
+    
+    def check_progress_counters(self, label):
+        """Check that the maintained statistics match the items they summarize"""
+        items_success, listing = self.test_get_progress_items()
+        dashboard_success, dashboard = self.test_get_progress_dashboard()
+        if not (items_success and dashboard_success):
+            return
+        items = listing['items']
+        statuses = {}
+        categories = {}
+        for item in items:
+            statuses[item['status']] = statuses.get(item['status'], 0) + 1
+            categories[item['category']] = categories.get(item['category'], 0) + 1
+        statistics = listing['statistics']
+        self.check(f"Item statistics match the items ({label})",
+                   (statistics['total'], statistics['completed'], statistics['in_progress'])
+                   == (len(items), statuses.get('completed', 0), statuses.get('in_progress', 0)), str(statistics))
+        distribution = {status: count for status, count in dashboard['status_distribution'].items() if count}
+        self.check(f"Dashboard statuses match the items ({label})", distribution == statuses, f"{distribution} != {statuses}")
+        breakdown = {category: stats['total'] for category, stats in dashboard['category_breakdown'].items()}
+        self.check(f"Dashboard categories match the items ({label})", breakdown == categories, f"{breakdown} != {categories}")
+        completed_by_category = {category: stats['completed'] for category, stats in dashboard['category_breakdown'].items()}
+        expected = {category: sum(1 for item in items if item['category'] == category and item['status'] == 'completed')
+                    for category in categories}
+        self.check(f"Dashboard category completions match the items ({label})", completed_by_category == expected,
+                   f"{completed_by_category} != {expected}")
+    
+    def check_progress_deadlines(self):
+        """Check the dashboard's deadline facets against the items' stored due dates"""
+        items_success, listing = self.test_get_progress_items()
+        dashboard_success, dashboard = self.test_get_progress_dashboard()
+        if not (items_success and dashboard_success):
+            return
+        now = datetime.utcnow()
+        open_due = []
+        for item in listing['items']:
+            if item['status'] in ('not_started', 'in_progress', 'blocked') and item.get('due_date'):
+                # Dates must come back as ISO datetimes; ISO strings stored by older seeding would not
+                # match the dashboard's date range queries
+                try:
+                    open_due.append(datetime.fromisoformat(item['due_date'].replace("Z", "")))
+                except ValueError:
+                    self.check("Due dates are ISO datetimes", False, item['due_date'])
+                    return
+        # Leave a minute either side of now for clock skew
+        overdue = sum(1 for due in open_due if due < now - timedelta(minutes=1))
+        upcoming = sum(1 for due in open_due if now + timedelta(minutes=1) <= due < now + timedelta(days=7))
+        overview = dashboard['overview']
+        self.check("Overdue count matches the items", overdue <= overview['overdue_items'] <= overdue + 1,
+                   f"{overview['overdue_items']} vs {overdue}")
+        self.check("Upcoming count matches the items", upcoming <= overview['upcoming_deadlines'] <= upcoming + 1,
+                   f"{overview['upcoming_deadlines']} vs {upcoming}")
+        for key in ('overdue_items', 'upcoming_deadlines'):
+            dates = [entry['due_date'] for entry in dashboard[key]]
+            self.check(f"Dashboard {key} are the earliest five, in due date order",
+                       len(dates) == min(5, overview[key]) and dates == sorted(dates), str(dates))
+    
+    def check_progress_seeded_once(self):
+        """Parallel first reads must leave exactly one set of sample items"""
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            codes = list(pool.map(lambda endpoint: self.send("GET", endpoint),
+                                  ["progress/items", "progress/dashboard"] * 3))
+        self.check("Parallel progress reads succeed", all(code == 200 for code in codes), str(codes))
+        items_success, listing = self.test_get_progress_items()
+        if items_success:
+            ids = [item['id'] for item in listing['items']]
+            titles = [item['title'] for item in listing['items']]
+            self.check("Progress items are seeded once", len(ids) == len(set(ids)) and len(titles) == len(set(titles)),
+                       f"{len(ids)} items, {len(set(titles))} distinct titles")
+    
+    def test_get_reminder_inbox(self):
+        """Test the in-app deadline reminder inbox"""
+        success, response = self.run_test(
+            "Get Reminder Inbox",
+            "GET",
+            "reminders/inbox?limit=10",
+            200,
+            auth_required=True
+        )
+        return success, response
+    
     def test_get_resources(self):
         """Test getting resources"""
         success, response = self.run_test(
@@ -334,6 +566,39 @@ class RelocateMeAPITester:
         )
         return success, response
 
+    def test_get_metrics(self, admin_token):
+        """Test getting backend cache metrics as a user listed in ADMIN_USERNAMES"""
+        user_token, self.token = self.token, admin_token
+        try:
+            success, response = self.run_test(
+                "Get Metrics",
+                "GET",
+                "metrics",
+                200,
+                auth_required=True
+            )
+        finally:
+            self.token = user_token
+        return success, response
+
+    def admin_login(self, username, password):
+        """Log in as an admin without replacing the regular user's token"""
+        user_token = self.token
+        try:
+            return self.token if self.test_login(username, password) else None
+        finally:
+            self.token = user_token
+
+    def test_get_metrics_anonymous(self):
+        """Test that metrics are not served without credentials"""
+        success, response = self.run_test(
+            "Get Metrics (Anonymous)",
+            "GET",
+            "metrics",
+            403
+        )
+        return success, response
+
     def print_summary(self):
         """Print test summary"""
         print("\n" + "="*50)
@@ -420,6 +685,71 @@ def main():
             job_type = job_listings['job_types'][0]
             tester.test_get_job_listings(job_type=job_type)
     
+    # Salary filters and ordering; sample salaries include "£25 - £45 per hour",
+    # which annualizes to £48,750 - £87,750
+    success, high_paid = tester.test_query_job_listings("min_salary", "min_salary=48000&fields=title,salary")
+    if success:
+        salaries = [job.get('salary') for job in high_paid['jobs']]
+        tester.check("min_salary keeps hourly pay above the floor", "£25 - £45 per hour" in salaries, str(salaries))
+        tester.check("min_salary drops lower ranges", "£22,000 - £26,000" not in salaries, str(salaries))
+        tester.check("fields= projects to id and requested fields",
+                     all(set(job) <= {"id", "title", "salary"} for job in high_paid['jobs']))
+    success, low_paid = tester.test_query_job_listings("max_salary", "max_salary=27000")
+    if success:
+        salaries = [job['salary'] for job in low_paid['jobs']]
+        tester.check("max_salary keeps ranges starting below the cap",
+                     "£22,000 - £26,000" in salaries and "£24,000 - £28,000" in salaries, str(salaries))
+        tester.check("max_salary drops hourly pay above the cap", "£25 - £45 per hour" not in salaries, str(salaries))
+    success, by_pay = tester.test_query_job_listings("sort=-salary", "sort=-salary&fields=salary")
+    if success:
+        salaries = [job.get('salary') for job in by_pay['jobs']]
+        if "£25 - £45 per hour" in salaries and "£45,000 - £65,000" in salaries:
+            tester.check("sort=-salary ranks annualized hourly pay first",
+                         salaries.index("£25 - £45 per hour") < salaries.index("£45,000 - £65,000"), str(salaries))
+    success, by_pay = tester.test_query_job_listings("sort=salary", "sort=salary&fields=salary")
+    if success and by_pay['jobs']:
+        tester.check("sort=salary lists the lowest range first", by_pay['jobs'][0].get('salary') == "£22,000 - £26,000",
+                     str(by_pay['jobs'][0]))
+    tester.test_query_job_listings("min_salary above max_salary", "min_salary=50000&max_salary=20000", 400)
+    tester.test_query_job_listings("unknown sort", "sort=title", 400)
+    
+    # Cursor pagination and field projection
+    success, first_page = tester.test_query_job_listings("limit=3", "limit=3")
+    if success:
+        tester.check("limit caps the page size", len(first_page['jobs']) <= 3)
+        if first_page.get('next_cursor'):
+            success, second_page = tester.test_query_job_listings("after cursor", f"limit=3&after={first_page['next_cursor']}")
+            if success:
+                first_ids = {job['id'] for job in first_page['jobs']}
+                tester.check("pages do not overlap", not first_ids & {job['id'] for job in second_page['jobs']})
+    tester.test_query_job_listings("invalid cursor", "after=not-a-cursor", 400)
+    tester.test_query_job_listings("unknown field", "fields=title,nonexistent", 400)
+    
+    # Radius search
+    success, nearby = tester.test_query_job_listings("near=Bakewell", "near=Bakewell&radius_km=25")
+    if success:
+        distances = [job['distance_km'] for job in nearby['jobs']]
+        tester.check("near results are within the radius", all(distance <= 25 for distance in distances), str(distances))
+        tester.check("near results are nearest first", distances == sorted(distances), str(distances))
+        tester.check("near finds the Bakewell job", any(job['location'].startswith("Bakewell") for job in nearby['jobs']))
+        success, with_remote = tester.test_query_job_listings("near with remote", "near=Bakewell&radius_km=25&include_remote=true")
+        if success:
+            tester.check("include_remote adds remote postings", with_remote['total'] > nearby['total'])
+    success, polar = tester.test_query_job_listings("near the pole", "near=89.9,0&radius_km=200")
+    if success:
+        tester.check("polar radius search returns no jobs", polar['total'] == 0)
+    tester.test_query_job_listings("near with sort", "near=Bakewell&sort=salary", 400)
+    tester.test_query_job_listings("radius out of range", "near=Bakewell&radius_km=500", 400)
+    
+    search_success, search_results = tester.test_search_jobs("marketing")
+    if search_success:
+        print(f"✅ Search returned {search_results.get('total', 0)} ranked jobs")
+    
+    tester.test_update_skills(["Digital marketing", "Social media", "Hiking"])
+    recommended_success, recommended = tester.test_get_recommended_jobs()
+    if recommended_success and recommended.get('jobs'):
+        print(f"✅ Top recommendation: {recommended['jobs'][0]['title']}")
+    
     tester.test_get_featured_jobs()
     tester.test_get_job_categories()
     
@@ -433,6 +763,16 @@ def main():
         if visa_data['visa_types']:
             visa_type = visa_data['visa_types'][0]['visa_type'].lower().replace(" ", "-")
             tester.test_get_visa_requirement_details(visa_type)
+        tester.test_get_visa_requirement_details("spouse-family-visa")
+    
+    eligibility_success, eligibility = tester.test_check_visa_eligibility([
+        {"applicant_id": "worker", "has_sponsored_job_offer": True, "job_skill_level": 4, "salary": 42000,
+         "english_level": "B2", "genuine_intention": True},
+        {"applicant_id": "unknown"}
+    ])
+    if eligibility_success:
+        for result in eligibility.get('results', []):
+            print(f"✅ {result['applicant_id']}: eligible for {result['eligible_visa_types']}")
     
     tester.test_get_visa_checklist()
     
@@ -440,6 +780,80 @@ def main():
     print("\n=== Testing Timeline Data ===")
     tester.test_get_timeline_full()
     tester.test_get_timeline_by_category()
+    schedule_success, schedule = tester.test_get_timeline_schedule()
+    if schedule_success:
+        print(f"✅ Projected completion {schedule.get('projected_completion')}, critical path {schedule.get('critical_path')}")
+        
+        # Critical path with some steps ticked off: it must run through the
+        # completed steps instead of stopping at the first one
+        original = {step['id']: step['is_completed'] for step in schedule['schedule']}
+        partly_completed = {1, 2, 3, 8, 12, 22}
+        tester.test_update_step_progress_batch([
+            {"step_id": step_id, "completed": step_id in partly_completed} for step_id in original
+        ])
+        partial_success, partial = tester.test_get_timeline_schedule()
+        if partial_success:
+            open_zero_slack = [step['id'] for step in partial['schedule'] if not step['is_completed'] and step['slack'] == 0]
+            tester.check("Critical path continues past completed steps", partial['critical_path'] == open_zero_slack,
+                         f"{partial['critical_path']} != {open_zero_slack}")
+            tester.check("Late zero-slack steps are marked critical",
+                         all(step['is_critical'] for step in partial['schedule'] if step['id'] in open_zero_slack))
+        tester.test_update_step_progress_batch([
+            {"step_id": step_id, "completed": completed} for step_id, completed in original.items()
+        ])
+    batch_success, batch = tester.test_update_step_progress_batch([
+        {"step_id": 4, "completed": True},
+        {"step_id": 4, "completed": False}
+    ])
+    if batch_success:
+        print(f"✅ {batch.get('total_completed')} steps completed ({batch.get('current_phase')})")
+    history_success, history = tester.test_get_progress_history()
+    if history_success:
+        print(f"✅ Progress history has {len(history.get('progress_history', []))} points")
+    tester.test_get_progress_history("month")
+    
+    # Test progress tracking: counters stay in step with the items under
+    # concurrent writes, and a reconcile racing them finds nothing to repair
+    print("\n=== Testing Progress Tracking ===")
+    admin_username = os.environ.get("RELOCATE_ADMIN_USERNAME")
+    admin_password = os.environ.get("RELOCATE_ADMIN_PASSWORD")
+    admin_token = tester.admin_login(admin_username, admin_password) if admin_username and admin_password else None
+    tester.check_progress_seeded_once()
+    tester.check_progress_counters("before writes")
+    tester.check_progress_deadlines()
+    items_success, listing = tester.test_get_progress_items()
+    if items_success and listing['items']:
+        items = listing['items']
+        with_subtasks = max(items, key=lambda item: len(item.get('subtasks', [])))
+        open_items = [item for item in items if item['status'] in ('not_started', 'in_progress')][:2]
+        toggles = [f"progress/items/{with_subtasks['id']}/subtask?subtask_index={index}"
+                   for index in range(len(with_subtasks.get('subtasks', [])))]
+        baseline = tester.test_reconcile_progress_counters(admin_token)[1] if admin_token else None
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            jobs = [pool.submit(tester.send, "POST", endpoint) for endpoint in toggles * 2]
+            jobs += [pool.submit(tester.send, "PUT", f"progress/items/{item['id']}", {"status": "blocked"}) for item in open_items]
+            if admin_token:
+                jobs += [pool.submit(tester.send, "POST", "admin/progress/reconcile", token=admin_token) for _ in range(3)]
+            statuses = [job.result() for job in jobs]
+        tester.check("Concurrent progress writes succeed or conflict cleanly",
+                     all(code in (200, 409) for code in statuses), str(statuses))
+        tester.check_progress_counters("after concurrent writes")
+        
+        if baseline is not None:
+            success, after = tester.test_reconcile_progress_counters(admin_token)
+            if success:
+                tester.check("Reconcile finds no drift after concurrent writes", after['repaired'] == baseline['repaired'],
+                             f"repaired {after['repaired'] - baseline['repaired']} users")
+        
+        # Put the sample data back
+        current = {item['id']: item for item in tester.test_get_progress_items()[1].get('items', [])}
+        for index, subtask in enumerate(with_subtasks.get('subtasks', [])):
+            if current[with_subtasks['id']]['subtasks'][index].get('completed') != subtask.get('completed'):
+                tester.send("POST", toggles[index])
+        for item in open_items:
+            tester.send("PUT", f"progress/items/{item['id']}", {"status": item['status']})
+        tester.check_progress_counters("after restoring")
     
     # Test resources endpoint
     print("\n=== Testing Resources ===")
@@ -456,6 +870,42 @@ def main():
     print("\n=== Testing Dashboard ===")
     tester.test_get_dashboard_overview()
     
+    # Test reminder inbox endpoint
+    print("\n=== Testing Reminders ===")
+    inbox_success, inbox = tester.test_get_reminder_inbox()
+    if inbox_success:
+        print(f"✅ {inbox.get('unread')} unread deadline reminders")
+    
+    # An open item due within the reminder lead time is reminded right away
+    due_soon = (datetime.utcnow() + timedelta(hours=1)).isoformat()
+    created_success, created = tester.run_test(
+        "Create Progress Item Due Soon", "POST", "progress/items", 200,
+        data={"title": "Reminder check", "category": "General", "due_date": due_soon}, auth_required=True
+    )
+    if created_success:
+        item_id = created['item']['id']
+        reminded = False
+        for _ in range(10):
+            inbox = tester.fetch("reminders/inbox?limit=100")
+            if any(notification.get('item_id') == item_id for notification in inbox.get('notifications', [])):
+                reminded = True
+                break
+            time.sleep(1)
+        tester.check("Item due within the lead time is reminded", reminded)
+        tester.send("DELETE", f"progress/items/{item_id}")
+    
+    # Test metrics endpoint
+    print("\n=== Testing Metrics ===")
+    tester.test_get_metrics_anonymous()
+    # Metrics need a user from the server's ADMIN_USERNAMES, which is empty by default
+    if admin_token:
+        metrics_success, metrics = tester.test_get_metrics(admin_token)
+        if metrics_success and metrics.get("user_cache", {}).get("hits", 0) > 0:
+            print(f"✅ User cache hit ratio: {metrics['user_cache']['hit_ratio']:.2f}")
+    else:
+        print("⏭️  Skipping admin metrics: set RELOCATE_ADMIN_USERNAME and RELOCATE_ADMIN_PASSWORD "
+              "to a user listed in the server's ADMIN_USERNAMES")
+    
     # Print summary
     all_passed = tester.print_summary()
     
@@ -498,19 +498,34 @@ const TimelinePage = () => {
 
   const updateStepProgress = async (stepId, completed) => {
     try {
-      await axios.post(`${API}/timeline/update-progress`, {
+      const response = await axios.post(`${API}/timeline/update-progress`, {
         step_id: stepId,
         completed: completed
       });
-      
-      // Refresh timeline data
-      const [fullResponse, categoryResponse] = await Promise.all([
-        axios.get(`${API}/timeline/full`),
-        axios.get(`${API}/timeline/by-category`)
-      ]);
-      setTimelineData({
-        full: fullResponse.data,
-        categories: categoryResponse.data
+
+      // Apply the returned progress summary instead of refetching the timeline
+      const summary = response.data;
+      const completedIds = new Set(summary.completed_step_ids);
+      const withStatus = (steps) => steps.map(step => ({ ...step, is_completed: completedIds.has(step.id) }));
+      setTimelineData(previous => {
+        const categories = {};
+        Object.entries(previous.categories).forEach(([name, category]) => {
+          categories[name] = {
+            ...category,
+            ...summary.categories[name],
+            steps: withStatus(category.steps)
+          };
+        });
+        return {
+          full: {
+            ...previous.full,
+            timeline: withStatus(previous.full.timeline),
+            completed_steps: summary.total_completed,
+            completion_percentage: summary.completion_percentage,
+            current_phase: summary.current_phase
+          },
+          categories
+        };
       });
     } catch (error) {
       console.error("Error updating progress:", error);